@@ -2,28 +2,53 @@
 # This template helps you create your own MCP (Model Context Protocol) server
 # that exposes custom tools/functions to AI assistants like Claude
 
+import anyio
 import asyncio
-import json
+import hashlib
+import inspect
+import logging
 import uvicorn
 import os
+from functools import lru_cache, partial
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-import requests
+import httpx
 from mcp import types as mcp_types 
 from mcp.server.lowlevel import Server
 from mcp.server.sse import SseServerTransport
+from sse_starlette.sse import EventSourceResponse
 from starlette.applications import Starlette
+from starlette.responses import Response
 from starlette.routing import Mount, Route
 
 # REPLACE THIS: Import your function tool wrapper
 from google.adk.tools.function_tool import FunctionTool
 from google.adk.tools.mcp_tool.conversion_utils import adk_to_mcp_tool_type
 
+# Compact JSON encoder used for every reply. orjson is much faster; without it,
+# the stdlib C encoder with compact separators is used (never indent=2, which
+# forces the slow pure-Python pretty-printer and doubles the bytes sent).
+try:
+    import orjson
+
+    def dumps_json(obj) -> str:
+        """Encodes obj as compact JSON text."""
+        return orjson.dumps(obj).decode()
+except ImportError:
+    import json
+
+    dumps_json = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
 # =====================================
 # CONFIGURATION SECTION
 # =====================================
 # Load environment variables from .env file
 load_dotenv()
 
+# Module logger: per-request traces are DEBUG, failures are WARNING.
+# Unlike print(), nothing is written for disabled levels.
+log = logging.getLogger(__name__)
+
 # CUSTOMIZE THESE: Set your server configuration
 APP_HOST = os.environ.get("APP_HOST", "0.0.0.0")  # Server host (usually keep as 0.0.0.0)
 APP_PORT = os.environ.get("APP_PORT", 8080)       # Server port (change if needed)
@@ -31,6 +56,46 @@ APP_PORT = os.environ.get("APP_PORT", 8080)       # Server port (change if neede
 # REPLACE THIS: Add your API endpoint URL if you're calling external services
 API_SERVER_URL = os.environ.get('API_SERVER_URL')  # Example: "https://your-api.com"
 
+# DO NOT MODIFY: Fail at startup on bad configuration instead of on first use
+if not APP_HOST.strip():
+    raise RuntimeError("APP_HOST must not be empty")
+try:
+    APP_PORT = int(APP_PORT)  # Environment variables are strings
+except ValueError:
+    raise RuntimeError(f"APP_PORT must be a port number, got {APP_PORT!r}") from None
+
+# REMOVE THIS CHECK if your tools don't call API_SERVER_URL
+if not API_SERVER_URL:
+    raise RuntimeError("API_SERVER_URL must be set (see the .env example below)")
+
+# =====================================
+# HTTP CLIENT SECTION
+# =====================================
+# One shared async HTTP client for all tool functions.
+# Awaiting it (instead of calling the blocking `requests` library) keeps the
+# event loop free, so concurrent tool calls overlap instead of queueing.
+# Its connection pool keeps connections to API_SERVER_URL alive between calls,
+# so each tool call skips the TCP + TLS handshake.
+# The Starlette lifespan handler creates it before the first request is
+# accepted, stores it on `starlette_app.state.http`, and closes it on shutdown.
+def create_http_client() -> httpx.AsyncClient:
+    """Builds the shared HTTP client (called once, by the lifespan handler)."""
+    return httpx.AsyncClient(
+        transport=httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_keepalive_connections=20,  # Idle connections kept open for reuse
+                max_connections=100,           # Hard cap on open upstream connections
+                keepalive_expiry=30.0,         # Seconds an idle connection is kept
+            ),
+            retries=2,  # Retry failed connection attempts (requests are not replayed)
+        ),
+        timeout=10.0,
+    )
+
+# CUSTOMIZE THIS: Most upstream requests allowed in flight at once.
+# Extra tool calls wait here instead of flooding API_SERVER_URL during bursts.
+UPSTREAM_LIMIT = asyncio.Semaphore(int(os.environ.get("MCP_UPSTREAM_CONCURRENCY", 16)))
+
 # =====================================
 # FUNCTION DEFINITIONS SECTION
 # =====================================
@@ -39,8 +104,10 @@ API_SERVER_URL = os.environ.get('API_SERVER_URL')  # Example: "https://your-api.
 # 1. Have a clear docstring describing what it does
 # 2. Return a string with the result
 # 3. Handle errors gracefully
+# 4. Be `async def` and `await starlette_app.state.http...` for network calls
+#    (never block the event loop), inside `async with UPSTREAM_LIMIT:`
 
-def your_first_function() -> str:
+async def your_first_function() -> str:
     """
     REPLACE THIS: Write a description of what your function does.
     This will be shown to the AI assistant so it knows when to use this tool.
@@ -50,20 +117,21 @@ def your_first_function() -> str:
     try:
         # REPLACE THIS: Add your function logic here
         # Example options:
-        # - Call an external API: requests.get("https://api.example.com/data")
+        # - Call an external API: await starlette_app.state.http.get("https://api.example.com/data")
         # - Perform calculations: result = number ** 2
         # - Read from database: db.query("SELECT * FROM table")
         # - Process files: with open("file.txt", "r") as f: content = f.read()
         
         # Example implementation:
-        response = requests.post(f"{API_SERVER_URL}/your-endpoint")
+        async with UPSTREAM_LIMIT:
+            response = await starlette_app.state.http.post(f"{API_SERVER_URL}/your-endpoint")
         response.raise_for_status()
         data = response.json()
         
         # CUSTOMIZE THIS: Return a meaningful success message
         return f"Success! Your function returned: {data.get('result')}"
         
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         # CUSTOMIZE THIS: Return a meaningful error message
         return f"Error: Your function failed. Reason: {e}"
     except Exception as e:
@@ -71,7 +139,7 @@ def your_first_function() -> str:
         return f"Unexpected error: {str(e)}"
 
 
-def your_second_function(parameter1: str, parameter2: int) -> str:
+async def your_second_function(parameter1: str, parameter2: int) -> str:
     """
     REPLACE THIS: Another function example with parameters.
     
@@ -91,7 +159,8 @@ def your_second_function(parameter1: str, parameter2: int) -> str:
             "message": parameter1,
             "user_id": parameter2
         }
-        response = requests.post(f"{API_SERVER_URL}/send-notification", json=payload)
+        async with UPSTREAM_LIMIT:
+            response = await starlette_app.state.http.post(f"{API_SERVER_URL}/send-notification", json=payload)
         response.raise_for_status()
         data = response.json()
         
@@ -104,11 +173,38 @@ def your_second_function(parameter1: str, parameter2: int) -> str:
 
 
 # ADD MORE FUNCTIONS: Copy the pattern above to add more functions
-# def your_third_function() -> str:
+# async def your_third_function() -> str:
 #     """Your third function description."""
 #     # Your implementation here
 #     pass
 
+
+# OPTIONAL BATCH FUNCTIONS: If your API has a batch endpoint, define a batch
+# version of a tool here and register it in BATCH_FUNCTIONS below. It receives
+# the argument dicts of several concurrent calls (already checked: unknown
+# arguments dropped, mandatory ones present) and must return one result per
+# call, in the same order. Example for an API with a batch endpoint:
+# async def your_second_function_batch(arguments_list: list[dict]) -> list[str]:
+#     """Sends several notifications in ONE upstream request."""
+#     try:
+#         payload = {
+#             "notifications": [
+#                 {"message": args["parameter1"], "user_id": args["parameter2"]}
+#                 for args in arguments_list
+#             ]
+#         }
+#         async with UPSTREAM_LIMIT:
+#             response = await starlette_app.state.http.post(f"{API_SERVER_URL}/your-batch-endpoint", json=payload)
+#         response.raise_for_status()
+#         results = response.json()["results"]  # One entry per notification
+#         return [
+#             f"Notification sent successfully! Message ID: {result.get('message_id')}"
+#             for result in results
+#         ]
+#     except Exception as e:
+#         # Every call in the batch gets the error message
+#         return [f"Failed to send notification. Error: {str(e)}"] * len(arguments_list)
+
 # =====================================
 # TOOL REGISTRATION SECTION
 # =====================================
@@ -120,12 +216,210 @@ your_second_functionTool = FunctionTool(your_second_function)
 # ADD MORE TOOLS: Create tool instances for additional functions
 # your_third_functionTool = FunctionTool(your_third_function)
 
-# REGISTER TOOLS: Add all your tools to this dictionary
-# Key = tool name, Value = tool instance
-available_tools = {
-    your_first_functionTool.name: your_first_functionTool,
-    your_second_functionTool.name: your_second_functionTool,
-    # ADD MORE: your_third_functionTool.name: your_third_functionTool,
+# REGISTER TOOLS: Add all your tools to this tuple
+TOOLS = (
+    your_first_functionTool,
+    your_second_functionTool,
+    # ADD MORE: your_third_functionTool,
+)
+
+# DO NOT MODIFY: Tool name -> tool instance, used to look up incoming calls
+available_tools = {tool.name: tool for tool in TOOLS}
+
+# DO NOT MODIFY: The tools never change while the server runs, so their MCP
+# schemas are built once here instead of on every list_tools request.
+MCP_TOOL_SCHEMAS = [adk_to_mcp_tool_type(tool) for tool in TOOLS]
+
+# Error reply for unknown tools, filled in with the (JSON-escaped) tool name
+UNKNOWN_TOOL_TEMPLATE = '{"error":"Tool \'%s\' not implemented."}'
+
+
+@lru_cache(maxsize=256)
+def unknown_tool_reply(name: str) -> list[mcp_types.TextContent]:
+    """
+    Builds the error reply for an unknown tool name once and reuses it.
+    DO NOT MODIFY: The MCP server copies the returned list, so sharing it is safe.
+    """
+    # Only the tool name needs JSON escaping; the rest is a fixed template
+    error_text = UNKNOWN_TOOL_TEMPLATE % dumps_json(name)[1:-1]
+    return [mcp_types.TextContent(type="text", text=error_text)]
+
+# =====================================
+# TOOL DISPATCH SECTION
+# =====================================
+# DO NOT MODIFY: FunctionTool.run_async() inspects the function signature on
+# every call. The adapters below do that work once, at startup, and then call
+# the function directly. FunctionTool is still used for the MCP schemas.
+
+def make_argument_checker(tool: FunctionTool):
+    """
+    Builds the argument check of FunctionTool.run_async() for one tool:
+    check(arguments) returns (call_args, None) with unknown arguments dropped,
+    or (None, error_dict) when mandatory arguments are missing.
+    """
+    parameters = inspect.signature(tool.func).parameters
+    valid_params = frozenset(parameters) - {"tool_context"}
+    mandatory_params = tuple(
+        param_name for param_name, param in parameters.items()
+        if param.default is param.empty and param_name != "tool_context"
+        and param.kind not in (param.VAR_POSITIONAL, param.VAR_KEYWORD)
+    )
+
+    def check(arguments: dict):
+        call_args = {key: value for key, value in arguments.items() if key in valid_params}
+        missing = [param_name for param_name in mandatory_params if param_name not in call_args]
+        if missing:
+            missing_str = "\n".join(missing)
+            return None, {"error": (
+                f"Invoking `{tool.name}()` failed as the following mandatory input "
+                f"parameters are not present:\n{missing_str}\nYou could retry calling "
+                "this tool, but it is IMPORTANT for you to provide all the mandatory parameters."
+            )}
+        return call_args, None
+
+    return check
+
+
+def make_tool_adapter(tool: FunctionTool):
+    """
+    Builds a direct caller for one tool with the same argument handling as
+    FunctionTool.run_async(): unknown arguments are dropped and missing
+    mandatory arguments are reported back as an error instead of raising.
+    """
+    func = tool.func
+    check_arguments = make_argument_checker(tool)
+    takes_tool_context = "tool_context" in inspect.signature(func).parameters
+    is_async = inspect.iscoroutinefunction(func)
+
+    async def adapter(arguments: dict):
+        call_args, error = check_arguments(arguments)
+        if error is not None:
+            return error
+        if takes_tool_context:
+            call_args["tool_context"] = None  # No ADK context outside an agent
+        if is_async:
+            return await func(**call_args)
+        # Plain functions run in a worker thread so they never block the event loop
+        return await asyncio.get_running_loop().run_in_executor(
+            None, partial(func, **call_args)
+        )
+
+    return adapter
+
+
+# Tool name -> adapter, used by call_tool
+TOOL_ADAPTERS = {tool.name: make_tool_adapter(tool) for tool in TOOLS}
+
+# REGISTER BATCH FUNCTIONS: Tools that have a batch version (optional)
+# Key = tool name, Value = batch function. Only add tools whose API really
+# has a batch endpoint; all other tools are batched with asyncio.gather.
+BATCH_FUNCTIONS = {
+    # EXAMPLE: your_second_functionTool.name: your_second_function_batch,
+}
+
+# =====================================
+# REQUEST BATCHING SECTION
+# =====================================
+# DO NOT MODIFY: Near-simultaneous calls to a tool with a batch function are
+# queued and sent upstream as ONE request. All other tools skip the queue
+# (and its wait) and are called directly.
+
+# CUSTOMIZE THESE: How long to wait for more calls, and the largest group
+BATCH_WINDOW_MS = float(os.environ.get("BATCH_WINDOW_MS", 2))
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", 32))
+
+
+class ToolBatcher:
+    """Queues calls to one tool and executes them in small batches."""
+
+    def __init__(self, tool_adapter, batch_function, check_arguments):
+        self.tool_adapter = tool_adapter        # Used when a "batch" has one call
+        self.batch_function = batch_function
+        self.check_arguments = check_arguments  # See make_argument_checker
+        self.queue = asyncio.Queue()
+        self.worker = None       # Started on the first call (needs a running loop)
+        self.in_flight = set()   # Keeps running batch tasks referenced
+
+    async def submit(self, arguments: dict):
+        """Queues one call and waits for its own result."""
+        if self.worker is None:
+            self.worker = asyncio.create_task(self._collect_batches())
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((arguments, future))
+        return await future
+
+    async def _collect_batches(self):
+        """Waits for a first call, gives others a short window, then drains."""
+        while True:
+            batch = [await self.queue.get()]
+            await asyncio.sleep(BATCH_WINDOW_MS / 1000)
+            while len(batch) < BATCH_MAX_SIZE and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            # Run the batch in its own task so the next one can start collecting
+            task = asyncio.create_task(self._execute(batch))
+            self.in_flight.add(task)
+            task.add_done_callback(self.in_flight.discard)
+
+    async def _execute(self, batch):
+        """Runs one batch and hands every caller its own result."""
+        if len(batch) == 1:
+            arguments, _ = batch[0]
+            try:
+                results = [await self.tool_adapter(arguments)]
+            except Exception as e:
+                results = [e]
+        else:
+            # Same checks as a single call: calls with missing mandatory
+            # arguments get their error, only the others go upstream
+            results = []
+            valid = []  # (position in results, checked arguments)
+            for arguments, _ in batch:
+                call_args, error = self.check_arguments(arguments)
+                if error is None:
+                    valid.append((len(results), call_args))
+                results.append(error)
+            if valid:
+                try:
+                    batch_results = await self.batch_function([call_args for _, call_args in valid])
+                    if len(batch_results) != len(valid):
+                        raise ValueError(
+                            f"Batch function returned {len(batch_results)} results for {len(valid)} calls"
+                        )
+                except Exception as e:  # Only the calls that went upstream failed
+                    batch_results = [e] * len(valid)
+                for (position, _), result in zip(valid, batch_results):
+                    results[position] = result
+
+        for (_, future), result in zip(batch, results):
+            if future.done():  # The caller went away (e.g. client disconnected)
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def close(self):
+        """Stops the background worker (called on server shutdown)."""
+        if self.worker is not None:
+            self.worker.cancel()
+
+
+# Only tools registered in BATCH_FUNCTIONS get a batcher
+tool_batchers = {
+    tool.name: ToolBatcher(
+        TOOL_ADAPTERS[tool.name],
+        BATCH_FUNCTIONS[tool.name],
+        make_argument_checker(tool),
+    )
+    for tool in TOOLS
+    if tool.name in BATCH_FUNCTIONS
+}
+
+# Tool name -> how call_tool runs it: queued for batching, or called directly
+TOOL_CALLERS = {
+    name: tool_batchers[name].submit if name in tool_batchers else tool_adapter
+    for name, tool_adapter in TOOL_ADAPTERS.items()
 }
 
 # =====================================
@@ -141,70 +435,145 @@ async def list_tools() -> list[mcp_types.Tool]:
     MCP handler to list available tools.
     DO NOT MODIFY: This function tells the AI what tools are available.
     """
-    # Convert each tool to MCP format
-    mcp_tools = []
-    for tool_name, tool_instance in available_tools.items():
-        schema = adk_to_mcp_tool_type(tool_instance)
-        mcp_tools.append(schema)
-        print(f"MCP Server: Advertising tool: {schema.name}")
-    
-    print(f"MCP Server: Received list_tools request. Total tools: {len(mcp_tools)}")
-    return mcp_tools
+    log.debug("Received list_tools request. Total tools: %d", len(MCP_TOOL_SCHEMAS))
+    return MCP_TOOL_SCHEMAS
 
 @app.call_tool()
 async def call_tool(
-    name: str, arguments: dict
+    name: str, arguments: dict, _callers=TOOL_CALLERS
 ) -> list[mcp_types.TextContent | mcp_types.ImageContent | mcp_types.EmbeddedResource]:
     """
     MCP handler to execute a tool call.
     DO NOT MODIFY: This function executes the tools when called by the AI.
     """
-    print(f"MCP Server: Received call_tool request for '{name}' with args: {arguments}")
+    log.debug("Received call_tool request for '%s' with args: %s", name, arguments)
 
     # Look up the tool by name
-    tool_to_call = available_tools.get(name)
-    if tool_to_call:
+    # (_callers is bound once at definition time: a fast local lookup per call)
+    tool_caller = _callers.get(name)
+    if tool_caller:
         try:
-            # Execute the tool
-            adk_response = await tool_to_call.run_async(
-                args=arguments,
-                tool_context=None,
-            )
-            print(f"MCP Server: Tool '{name}' executed successfully.")
+            # Execute the tool (batched with concurrent calls if it has a batch function)
+            adk_response = await tool_caller(arguments)
+            log.debug("Tool '%s' executed successfully.", name)
             
             # Return the response as MCP text content
-            response_text = json.dumps(adk_response, indent=2)
+            response_text = dumps_json(adk_response)
             return [mcp_types.TextContent(type="text", text=response_text)]
 
         except Exception as e:
-            print(f"MCP Server: Error executing tool '{name}': {e}")
-            error_text = json.dumps({"error": f"Failed to execute tool '{name}': {str(e)}"})
+            log.warning("Error executing tool '%s': %s", name, e)
+            error_text = dumps_json({"error": f"Failed to execute tool '{name}': {str(e)}"})
             return [mcp_types.TextContent(type="text", text=error_text)]
     else:
         # Handle unknown tools
-        print(f"MCP Server: Tool '{name}' not found.")
-        error_text = json.dumps({"error": f"Tool '{name}' not implemented."})
-        return [mcp_types.TextContent(type="text", text=error_text)]
+        log.debug("Tool '%s' not found.", name)
+        return unknown_tool_reply(name)
+
+# =====================================
+# TOOL CATALOG SECTION
+# =====================================
+# DO NOT MODIFY: GET /tools returns the same tool list as list_tools as plain
+# JSON, for clients and orchestrators that discover servers over HTTP. The
+# catalog never changes while the server runs, so the body and its ETag are
+# built once; a client that sends the ETag back gets an empty 304 reply.
+TOOL_CATALOG_BYTES = dumps_json(
+    [schema.model_dump(mode="json", by_alias=True, exclude_none=True) for schema in MCP_TOOL_SCHEMAS]
+).encode()
+TOOL_CATALOG_ETAG = '"%s"' % hashlib.blake2b(TOOL_CATALOG_BYTES, digest_size=8).hexdigest()
+TOOL_CATALOG_HEADERS = {"ETag": TOOL_CATALOG_ETAG, "Cache-Control": "public, max-age=60"}
+
+
+async def get_tools_catalog(request):
+    """Serves the tool catalog, or 304 Not Modified if the client has it."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (
+        if_none_match.strip() == "*"
+        or TOOL_CATALOG_ETAG in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    ):
+        return Response(status_code=304, headers=TOOL_CATALOG_HEADERS)
+    return Response(TOOL_CATALOG_BYTES, media_type="application/json", headers=TOOL_CATALOG_HEADERS)
 
 # =====================================
 # SERVER TRANSPORT SECTION
 # =====================================
 # DO NOT MODIFY: This section handles the communication protocol
 
+# Seconds between heartbeat frames on the SSE stream. Proxies and load balancers
+# (nginx, AWS ALB, ...) close connections that stay silent for ~30-60s, e.g.
+# while a slow tool runs. The heartbeat is an SSE comment line (": ping ..."),
+# which clients ignore. The MCP transport creates the EventSourceResponse
+# itself, so the interval is set as the class default.
+SSE_HEARTBEAT_SECONDS = float(os.environ.get("SSE_HEARTBEAT_SECONDS", 15))
+EventSourceResponse.DEFAULT_PING_INTERVAL = SSE_HEARTBEAT_SECONDS
+
+# Messages the MCP session may queue for one client before it has to wait.
+# The SSE stream writes them at the client's pace; nothing is ever dropped,
+# because every queued message is a JSON-RPC reply the client is waiting for.
+SSE_SEND_BUFFER = int(os.environ.get("SSE_SEND_BUFFER", 256))
+
+
 async def handle_sse(request):
     """Handles Server-Sent Events for MCP communication."""
     async with sse.connect_sse(
         request.scope, request.receive, request._send
     ) as streams:
-        await app.run(
-            streams[0], streams[1], app.create_initialization_options()
-        )
+        # Bounded outbox between the MCP session and this client's SSE stream,
+        # so finished tool calls hand off their reply instead of waiting for a
+        # slow client to read the previous one
+        outbox_send, outbox_receive = anyio.create_memory_object_stream(SSE_SEND_BUFFER)
+
+        async def relay_outbox():
+            async with outbox_receive:
+                try:
+                    async for message in outbox_receive:
+                        await streams[1].send(message)
+                except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+                    pass  # Client disconnected
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(relay_outbox)
+            async with outbox_send:
+                await app.run(
+                    streams[0], outbox_send, app.create_initialization_options()
+                )
+
+    # The SSE response has already been sent; returning an empty Response keeps
+    # Starlette from raising (and logging) an error each time a client leaves
+    return Response()
+
+
+# Body returned for any unhandled error. Built once, and never includes a
+# traceback or exception text that could leak server internals to clients.
+INTERNAL_ERROR_BODY = dumps_json({"error": "Internal server error"}).encode()
+
+
+async def handle_internal_error(request, exc):
+    """Returns a minimal JSON 500 response for unhandled errors."""
+    log.warning("Unhandled error on %s: %s", request.url.path, exc)
+    return Response(INTERNAL_ERROR_BODY, status_code=500, media_type="application/json")
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Creates the shared HTTP client before the server accepts requests, then
+    stops the batch workers and closes the client on shutdown.
+    """
+    app.state.http = create_http_client()
+    yield
+    for batcher in tool_batchers.values():
+        batcher.close()
+    await app.state.http.aclose()
 
 # Create the Starlette ASGI application
 starlette_app = Starlette(
-    debug=True,
+    debug=False,  # Debug mode adds traceback middleware; only enable it locally
+    middleware=[],  # CUSTOMIZE: Add CORS/GZip/etc. only if you need them
+    exception_handlers={500: handle_internal_error},
+    lifespan=lifespan,
     routes=[
         Route("/sse", endpoint=handle_sse),
+        Route("/tools", endpoint=get_tools_catalog, methods=["GET"]),
         Mount("/messages/", app=sse.handle_post_message),
     ],
 )
@@ -215,13 +584,30 @@ starlette_app = Starlette(
 # CUSTOMIZE THIS: You can modify the startup messages but keep the core logic
 
 if __name__ == "__main__":
+    # CUSTOMIZE: Use logging.DEBUG to see every list_tools / call_tool request
+    logging.basicConfig(level=logging.WARNING)
+
     print("🚀 Launching Your Custom MCP Server...")
     print(f"📡 Server will run on {APP_HOST}:{APP_PORT}")
     print(f"🔧 Available tools: {list(available_tools.keys())}")
     
     try:
         # Start the server
-        asyncio.run(uvicorn.run(starlette_app, host=APP_HOST, port=APP_PORT))
+        # uvicorn.run() manages its own event loop, so it must NOT be wrapped in
+        # asyncio.run(). uvloop (libuv event loop) and httptools (C HTTP parser)
+        # replace the pure-Python defaults on the SSE / tool-call hot path.
+        uvicorn.run(
+            starlette_app,
+            host=APP_HOST,
+            port=APP_PORT,
+            loop="uvloop",
+            http="httptools",
+            log_level="warning",
+            access_log=False,
+            backlog=2048,            # Pending connections the OS queues during bursts
+            limit_concurrency=512,   # Above this, new requests get a fast 503
+            timeout_keep_alive=5,    # Close idle keep-alive connections after 5s
+        )
     except KeyboardInterrupt:
         print("\n⏹️  MCP Server stopped by user.")
     except Exception as e:
@@ -238,11 +624,11 @@ EXAMPLE 1: Weather Service MCP Server
 --------------------------------------
 Replace the functions above with:
 
-def get_weather(city: str) -> str:
+async def get_weather(city: str) -> str:
     '''Gets current weather for a specified city.'''
     try:
         api_key = os.environ.get('WEATHER_API_KEY')
-        response = requests.get(f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}")
+        response = await starlette_app.state.http.get(f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}")
         response.raise_for_status()
         data = response.json()
         temp = data['main']['temp'] - 273.15  # Convert from Kelvin to Celsius
@@ -251,11 +637,11 @@ def get_weather(city: str) -> str:
     except Exception as e:
         return f"Failed to get weather for {city}: {str(e)}"
 
-def get_forecast(city: str, days: int) -> str:
+async def get_forecast(city: str, days: int) -> str:
     '''Gets weather forecast for specified city and number of days.'''
     try:
         api_key = os.environ.get('WEATHER_API_KEY')
-        response = requests.get(f"https://api.openweathermap.org/data/2.5/forecast?q={city}&cnt={days*8}&appid={api_key}")
+        response = await starlette_app.state.http.get(f"https://api.openweathermap.org/data/2.5/forecast?q={city}&cnt={days*8}&appid={api_key}")
         response.raise_for_status()
         data = response.json()
         forecast_summary = f"5-day forecast for {city}:\\n"
@@ -339,7 +725,7 @@ def insert_record(table: str, data: str) -> str:
 SETUP INSTRUCTIONS:
 ==================
 1. Install dependencies:
-   pip install uvicorn python-dotenv requests mcp starlette
+   pip install "uvicorn[standard]" python-dotenv httpx orjson mcp starlette
 
 2. Create .env file with your configuration:
    APP_HOST=0.0.0.0
@@ -351,19 +737,27 @@ SETUP INSTRUCTIONS:
 4. Update the tool registration section
 5. Change the server name
 6. Run: python main.py
+   Production (see Dockerfile):
+   gunicorn main:starlette_app -k uvicorn.workers.UvicornWorker -w $WEB_CONCURRENCY
 
 ENVIRONMENT VARIABLES TO SET:
 ============================
 - APP_HOST: Server host address (default: 0.0.0.0)
 - APP_PORT: Server port (default: 8080)
 - API_SERVER_URL: External API URL if calling external services
+- WEB_CONCURRENCY: gunicorn worker processes (default: 1, see Dockerfile)
+- MCP_UPSTREAM_CONCURRENCY: Most upstream requests in flight at once (default: 16)
+- SSE_HEARTBEAT_SECONDS: Seconds between SSE keep-alive frames (default: 15)
+- BATCH_WINDOW_MS: How long concurrent calls to a batched tool are collected (default: 2)
+- BATCH_MAX_SIZE: Largest number of calls handled as one batch (default: 32)
 - Add any API keys, database URLs, or other configuration here
 
 CUSTOMIZATION CHECKLIST:
 ========================
 □ Replace function definitions with your own
 □ Update function docstrings
-□ Register your tools in available_tools dictionary
+□ Register your tools in the TOOLS tuple
+□ Register batch functions in BATCH_FUNCTIONS (or leave it empty)
 □ Change server name in Server() constructor
 □ Set up environment variables
 □ Test your functions work correctly
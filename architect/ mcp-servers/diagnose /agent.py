@@ -8,14 +8,18 @@
 # 4. Handle complex workflows with delegation
 
 import asyncio
+import builtins
+import httpx
 import os
+import threading
+import time
 from contextlib import AsyncExitStack
+from functools import lru_cache
 from dotenv import load_dotenv
 from google.adk.agents.llm_agent import LlmAgent
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset
 from google.adk.tools.mcp_tool.mcp_session_manager import SseServerParams
 import logging 
-import nest_asyncio 
 from toolbox_core import ToolboxSyncClient
 
 # =====================================
@@ -32,7 +36,14 @@ log = logging.getLogger(__name__)
 # GLOBAL VARIABLES SECTION
 # =====================================
 # DO NOT MODIFY: These are needed for proper agent lifecycle management
-root_agent: LlmAgent | None = None
+# The agent is built on first use - get_agent(), `await initialize()`, or
+# reading `root_agent` from this module - not when the module is imported.
+# Every entry point builds through _get_or_build_agent(), so one lock
+# covers them all; late arrivals find the agent built.
+_root_agent: LlmAgent | None = None
+_root_agent_lock = threading.Lock()
+_warm_task: asyncio.Task | None = None  # initialize()'s warm-up, shared by concurrent callers
+_initialized = False  # Set once initialize() has built and warmed the agent
 exit_stack: AsyncExitStack | None = None
 
 # =====================================
@@ -56,195 +67,126 @@ FUNCTION_TOOLS_URL = os.environ.get("FUNCTION_TOOLS_URL")
 # ADD MORE URLS: If you have additional MCP servers
 # EXTRA_TOOLS_URL = os.environ.get("EXTRA_TOOLS_URL")
 
-# Debug print statements - CUSTOMIZE: Update these to match your URLs
-print(f"DB_TOOLS_URL: {DB_TOOLS_URL}")
-print(f"API_TOOLS_URL: {API_TOOLS_URL}")
-print(f"FUNCTION_TOOLS_URL: {FUNCTION_TOOLS_URL}")
+# Debug log line - CUSTOMIZE: Update this to match your URLs
+# (shown with logging level DEBUG; the text is only built when it is shown)
+log.debug("tool urls: db=%s api=%s function=%s", DB_TOOLS_URL, API_TOOLS_URL, FUNCTION_TOOLS_URL)
 
 # =====================================
-# AGENT CREATION FUNCTION
+# TOOLSET CACHE SECTION
 # =====================================
-async def get_agent_async():
-    """
-    Creates and configures your multi-agent system.
-    
-    CUSTOMIZE THIS FUNCTION: Modify to create your own agents and tool connections.
-    
-    Returns:
-        LlmAgent: The main coordinating agent
-    """
-    
-    # Print URLs for debugging
-    print(f"Connecting to DB_TOOLS_URL: {DB_TOOLS_URL}")
-    print(f"Connecting to API_TOOLS_URL: {API_TOOLS_URL}")
-    print(f"Connecting to FUNCTION_TOOLS_URL: {FUNCTION_TOOLS_URL}")
-
-    # =====================================
-    # TOOLSET CONNECTIONS SECTION
-    # =====================================
-    # CUSTOMIZE: Connect to your database toolbox
-    toolbox = ToolboxSyncClient(DB_TOOLS_URL)
-    
-    # REPLACE: Load your specific toolset from the database server
-    # This should match a toolset name from your tools.yaml file
-    toolDB = toolbox.load_toolset('YOUR-TOOLSET-NAME')  # Replace with your actual toolset name
-    
-    # CUSTOMIZE: Connect to your API-based MCP servers
-    toolAPI = MCPToolset(
-        connection_params=SseServerParams(url=API_TOOLS_URL, headers={})
-    )
-    
-    toolFunction = MCPToolset(
-        connection_params=SseServerParams(url=FUNCTION_TOOLS_URL, headers={})
-    )
-    
-    # ADD MORE TOOLSETS: Connect to additional MCP servers if needed
-    # toolExtra = MCPToolset(
-    #     connection_params=SseServerParams(url=EXTRA_TOOLS_URL, headers={})
-    # )
-
-    # =====================================
-    # SPECIALIZED AGENTS SECTION
-    # =====================================
-    # REPLACE THESE: Create your own specialized agents
-    
-    # AGENT 1: Database/Information Retrieval Agent
-    # CUSTOMIZE: This agent handles data lookup and retrieval
-    db_agent = LlmAgent(
-        model='gemini-2.5-flash',  # CUSTOMIZE: Choose your preferred model
-        name='YOUR_DB_AGENT_NAME',  # REPLACE: Give your agent a meaningful name
-        instruction="""
-            REPLACE THIS INSTRUCTION: Define what this agent does.
-            
-            Example instructions:
-            - "You are a Data Analyst. Your job is to query databases and retrieve information."
-            - "You are a Customer Service Agent. Look up customer data and order history."
-            - "You are a Research Assistant. Search databases for relevant information."
-            
-            Be specific about:
-            - What this agent should do
-            - What tools it should use
-            - What it should NOT do
-        """,
-        tools=toolDB  # This agent uses database tools
-    )
-    
-    # AGENT 2: Action/API Agent  
-    # CUSTOMIZE: This agent handles actions and external API calls
-    api_agent = LlmAgent(
-        model='gemini-2.5-flash',  # CUSTOMIZE: Choose your preferred model
-        name='YOUR_API_AGENT_NAME',  # REPLACE: Give your agent a meaningful name
-        instruction="""
-            REPLACE THIS INSTRUCTION: Define what this agent does.
-            
-            Example instructions:
-            - "You are an Integration Agent. Execute API calls and external actions."
-            - "You are a Notification Agent. Send emails, SMS, and push notifications."
-            - "You are an Automation Agent. Trigger workflows and process data."
-            
-            Be specific about:
-            - What actions this agent can perform
-            - Which APIs it should call
-            - Any limitations or safety guidelines
-        """,
-        tools=[toolFunction, toolAPI]  # This agent uses function and API tools
-    )
-    
-    # ADD MORE AGENTS: Create additional specialized agents if needed
-    # analytics_agent = LlmAgent(
-    #     model='gemini-2.5-flash',
-    #     name='analytics_agent',
-    #     instruction="You analyze data and generate reports.",
-    #     tools=toolExtra
-    # )
-
-    # =====================================
-    # MASTER COORDINATOR AGENT
-    # =====================================
-    # CUSTOMIZE: This is your main agent that delegates to specialists
-    root_agent = LlmAgent(
-        model='gemini-2.5-flash',  # CUSTOMIZE: Choose your preferred model
-        name='YOUR_MASTER_AGENT_NAME',  # REPLACE: Name your coordinator agent
-        instruction="""
-            REPLACE THIS INSTRUCTION: Define how your master agent delegates tasks.
-            
-            You are the Master Coordinator. Your job is to analyze user requests 
-            and delegate them to the right specialist agent.
-            
-            CUSTOMIZE: List your agents and their roles:
-            - **YOUR_DB_AGENT_NAME**: Handles all data lookup, search, and retrieval tasks
-            - **YOUR_API_AGENT_NAME**: Handles all actions, API calls, and external operations
-            
-            DELEGATION RULES:
-            - For questions about existing data → delegate to YOUR_DB_AGENT_NAME
-            - For actions that change things → delegate to YOUR_API_AGENT_NAME
-            - For analysis tasks → delegate to [specify which agent]
-            
-            You do NOT perform tasks yourself - you only coordinate and delegate.
-        """,
-        sub_agents=[db_agent, api_agent],  # LIST: Include all your specialized agents
-        # sub_agents=[db_agent, api_agent, analytics_agent],  # ADD MORE: Include additional agents
-    )
-    
-    print("✅ Multi-agent system created successfully.")
-    return root_agent
+# Downloaded toolbox toolsets are kept and reused when the agents are
+# built again (e.g. per session), so a rebuild doesn't go back to the
+# database toolbox server. Each cached toolset is kept for at most
+# TOOLSET_CACHE_SECONDS.
+# CUSTOMIZE: 0 = download the toolset on every build
+TOOLSET_CACHE_SECONDS = 300
+
+@lru_cache(maxsize=16)
+def _load_toolset_cached(url, name, _bucket):
+    """Downloads toolset `name` from the toolbox at `url`. _bucket only ages the cache entry."""
+    return ToolboxSyncClient(url).load_toolset(name)
+
+def load_toolset(name, url=None):
+    """Returns toolbox toolset `name`, from the cache if it's fresh enough (blocking)."""
+    url = url or DB_TOOLS_URL
+    if TOOLSET_CACHE_SECONDS <= 0:
+        return ToolboxSyncClient(url).load_toolset(name)
+    # The bucket number changes every TOOLSET_CACHE_SECONDS, which turns
+    # the next lookup into a miss and so downloads the toolset again.
+    return _load_toolset_cached(url, name, int(time.time() // TOOLSET_CACHE_SECONDS))
+
+def invalidate_toolset_cache():
+    """Forgets all cached toolsets: call after changing tools.yaml on the toolbox server."""
+    _load_toolset_cached.cache_clear()
 
 # =====================================
-# INITIALIZATION FUNCTION
+# MCP TOOL LIST CACHE SECTION
 # =====================================
-# DO NOT MODIFY: This function handles proper agent initialization
-async def initialize():
-    """Initializes the global root_agent safely."""
-    global root_agent
-    if root_agent is None:
-        log.info("🔄 Initializing agent system...")
-        root_agent = await get_agent_async()
-        if root_agent:
-            log.info("✅ Agent system initialized successfully.")
-        else:
-            log.error("❌ Agent system initialization failed.")
-    else:
-        log.info("ℹ️  Agent system already initialized.")
+# A plain MCPToolset asks its server for the tool list on every agent run.
+# This version asks once and reuses the answer for as long as the agent
+# lives; the MCP session itself is still managed by ADK as usual.
+# (This ADK version's MCPToolset has no cache_tools_list option of its own.)
+class CachedMCPToolset(MCPToolset):
+    """MCPToolset that remembers its server's tool list."""
+
+    def __init__(self, *, cache_tools_list=True, **kwargs):
+        super().__init__(**kwargs)
+        # A tool_filter function may pick different tools per request, so
+        # its answers are never cached
+        self._cache_tools_list = cache_tools_list and not callable(self.tool_filter)
+        self._tools = None
+
+    async def get_tools(self, readonly_context=None):
+        if not self._cache_tools_list:
+            return await super().get_tools(readonly_context)
+        if self._tools is None:
+            self._tools = await super().get_tools(readonly_context)
+        return list(self._tools)  # Callers may change their copy
+
+    def invalidate_tools_cache(self):
+        """Lists the server's tools again on the next run (e.g. after the server added tools)."""
+        self._tools = None
+
+@lru_cache(maxsize=None)
+def _sse_params(url):
+    """Connection params for the MCP server at url: one shared object per URL, made on first use."""
+    return SseServerParams(url=url, headers={})  # CUSTOMIZE: headers (e.g. auth) if needed
+
+def invalidate_tools_cache():
+    """Makes every MCP toolset of the current agent list its server's tools again."""
+    agents = [_root_agent] if _root_agent is not None else []
+    while agents:
+        agent = agents.pop()
+        agents.extend(agent.sub_agents)
+        for tool in getattr(agent, "tools", ()):
+            if isinstance(tool, CachedMCPToolset):
+                tool.invalidate_tools_cache()
 
 # =====================================
-# MODULE STARTUP SECTION
+# WARM-UP SECTION
 # =====================================
-# DO NOT MODIFY: This handles the async initialization properly
-nest_asyncio.apply()
-
-log.info("🚀 Starting agent initialization...")
-try:
-    asyncio.run(initialize())
-    log.info("✅ Module initialization completed successfully.")
-except RuntimeError as e:
-    log.error(f"⚠️  RuntimeError during initialization (likely nested loops): {e}", exc_info=True)
-except Exception as e:
-    log.error(f"❌ Unexpected error during initialization: {e}", exc_info=True)
-
-# =====================================
-# OPTIONAL: ADDITIONAL FUNCTIONS
-# =====================================
-# ADD YOUR OWN: Create helper functions for your specific use case
-
-def get_agent():
-    """
-    OPTIONAL: Synchronous wrapper to get the initialized agent.
-    CUSTOMIZE: Add your own helper functions here.
-    """
-    global root_agent
-    if root_agent is None:
-        raise RuntimeError("Agent not initialized. Call initialize() first.")
-    return root_agent
-
-# ADD MORE HELPERS: Create additional utility functions as needed
-# def reset_agent():
-#     """Resets the agent system."""
-#     global root_agent
-#     root_agent = None
-
-# def is_agent_ready():
-#     """Checks if the agent system is ready."""
-#     return root_agent is not None
+# The first request to a new agent normally also connects to its MCP
+# servers and lists their tools. initialize() does that up front, so the
+# first user doesn't wait for it. No prompt is sent: that would cost tokens
+# and could make the agents call tools that change things.
+# CUSTOMIZE: False = skip the warm-up
+# (MCP connections opened here belong to the event loop that awaited
+# initialize(), so await it on the loop that will serve requests.)
+WARM_UP_ON_INIT = True
+
+# Errors meaning "a tool server can't be reached": expected while servers
+# start up, so they are logged in one line, without a traceback.
+# (OSError covers ConnectionError and TimeoutError; httpx raises its own.)
+_NETWORK_ERRORS = (OSError, httpx.TransportError)
+
+# Exception groups only exist on Python 3.11+; before that nothing is wrapped
+_EXCEPTION_GROUP = getattr(builtins, "BaseExceptionGroup", ())
+
+def _unwrap(exc):
+    """The first actual error inside exception groups (MCP wraps its connection errors in one)."""
+    while isinstance(exc, _EXCEPTION_GROUP):
+        exc = exc.exceptions[0]
+    return exc
+
+async def _warm_agent_caches(agent):
+    """Fills the MCP tool-list caches of agent and its sub-agents. Failures are only logged."""
+    agents = []
+    pending = [agent]
+    while pending:
+        a = pending.pop()
+        agents.append(a)
+        pending.extend(a.sub_agents)
+
+    async def warm(a):
+        await a.canonical_tools()  # Lists MCP tools (cached from now on)
+
+    results = await asyncio.gather(*(warm(a) for a in agents), return_exceptions=True)
+    for a, result in zip(agents, results):
+        if isinstance(_unwrap(result), _NETWORK_ERRORS):
+            log.warning("warm-up of %s: network error: %r", a.name, _unwrap(result))
+        elif isinstance(result, Exception):
+            log.warning("warm-up of %s failed: %s", a.name, result)
+            log.debug("warm-up traceback", exc_info=result)  # Formatted only with DEBUG on
 
 # =====================================
 # ENVIRONMENT VARIABLES GUIDE
@@ -440,49 +382,125 @@ business_coordinator = LlmAgent(
 )
 """
 
+# =====================================
+# AGENT INSTRUCTIONS SECTION
+# =====================================
+# The agents' instructions, kept in one place and created once when the
+# module loads; create_agent() only refers to them. Every build sends
+# the model the same instruction text.
+
+# AGENT 1 (database/retrieval specialist)
+# REPLACE: Describe this agent's role
+_DB_AGENT_INSTRUCTION = """
+            REPLACE THIS ENTIRE INSTRUCTION with your agent's role.
+            
+            TEMPLATE:
+            You are a [ROLE NAME]. Your job is to:
+            - [What this agent does - be specific]
+            - [What tools it uses]
+            - [What it should NOT do]
+            
+            EXAMPLES:
+            - Data lookup and search operations
+            - Customer information retrieval  
+            - Product catalog queries
+            - Historical data analysis
+            
+            Use your database tools to find and retrieve information.
+            You do NOT create, update, or delete data.
+        """
+
+# AGENT 2 (action/API specialist)
+# REPLACE: Describe this agent's role
+_API_AGENT_INSTRUCTION = """
+            REPLACE THIS ENTIRE INSTRUCTION with your agent's role.
+            
+            TEMPLATE:
+            You are a [ROLE NAME]. Your job is to:
+            - [What actions this agent performs]
+            - [What APIs it calls]
+            - [What changes it can make]
+            
+            EXAMPLES:
+            - Send notifications and communications
+            - Process payments and transactions
+            - Update records and preferences
+            - Trigger automated workflows
+            
+            Use your API and function tools to perform actions and make changes.
+            Always confirm important actions before executing.
+        """
+
+# MASTER COORDINATOR
+# REPLACE: Describe how requests are delegated (use your agents' names)
+_ROOT_AGENT_INSTRUCTION = """
+            REPLACE THIS ENTIRE INSTRUCTION with your coordination logic.
+            
+            TEMPLATE:
+            You are the [SYSTEM NAME] Coordinator. Your role is to analyze user requests 
+            and delegate them to the correct specialist agent.
+            
+            You command these specialists:
+            - **YOUR_DB_AGENT_NAME**: Delegate requests for [describe when to use]
+            - **YOUR_API_AGENT_NAME**: Delegate requests for [describe when to use]
+            
+            DELEGATION EXAMPLES:
+            - Questions starting with "What", "Show me", "Find" → YOUR_DB_AGENT_NAME
+            - Actions starting with "Send", "Create", "Update", "Process" → YOUR_API_AGENT_NAME
+            
+            IMPORTANT: You analyze and delegate only. You do NOT perform tasks yourself.
+        """
+
 # =====================================
 # AGENT CREATION FUNCTION
 # =====================================
-async def get_agent_async():
+def create_agent():
     """
     Creates and configures your multi-agent system.
     
     MAIN CUSTOMIZATION AREA: This is where you define your agents and their roles.
+    Blocking (it downloads the toolbox toolset), but it opens no MCP
+    sessions: those are opened, and the tool lists fetched, on the event
+    loop that serves requests (see initialize()).
     
     Returns:
         LlmAgent: The main coordinating agent
     """
     
-    # Debug print statements
-    print(f"🔗 Connecting to DB_TOOLS_URL: {DB_TOOLS_URL}")
-    print(f"🔗 Connecting to API_TOOLS_URL: {API_TOOLS_URL}")
-    print(f"🔗 Connecting to FUNCTION_TOOLS_URL: {FUNCTION_TOOLS_URL}")
+    # Debug log lines (shown with logging level DEBUG; formatted only then)
+    log.debug("🔗 Connecting to DB_TOOLS_URL: %s", DB_TOOLS_URL)
+    log.debug("🔗 Connecting to API_TOOLS_URL: %s", API_TOOLS_URL)
+    log.debug("🔗 Connecting to FUNCTION_TOOLS_URL: %s", FUNCTION_TOOLS_URL)
 
     # =====================================
     # TOOLSET CONNECTIONS
     # =====================================
     # STEP 1: Connect to your database toolbox server
-    toolbox = ToolboxSyncClient(DB_TOOLS_URL)
-    
     # REPLACE: Load your specific toolset (must match name in tools.yaml)
-    toolDB = toolbox.load_toolset('YOUR-TOOLSET-NAME')  
-    # Example: toolDB = toolbox.load_toolset('customer-management')
+    # A toolset downloaded by an earlier build is reused (TOOLSET_CACHE_SECONDS).
+    toolDB = load_toolset('YOUR-TOOLSET-NAME')
+    # Example: load_toolset('customer-management')
     
     # STEP 2: Connect to your MCP function servers
-    # CUSTOMIZE: Add connection parameters and headers if needed
-    toolAPI = MCPToolset(
-        connection_params=SseServerParams(url=API_TOOLS_URL, headers={})
+    # CUSTOMIZE: Add connection parameters and headers if needed (in _sse_params)
+    # (no network here yet: an MCPToolset connects when its tools are first listed)
+    # The tool lists are fetched once and reused (see MCP TOOL LIST CACHE SECTION)
+    toolAPI = CachedMCPToolset(
+        connection_params=_sse_params(API_TOOLS_URL),
+        cache_tools_list=True,
     )
     
-    toolFunction = MCPToolset(
-        connection_params=SseServerParams(url=FUNCTION_TOOLS_URL, headers={})
+    toolFunction = CachedMCPToolset(
+        connection_params=_sse_params(FUNCTION_TOOLS_URL),
+        cache_tools_list=True,
     )
     
     # ADD MORE: Connect to additional MCP servers
-    # toolExtra = MCPToolset(
-    #     connection_params=SseServerParams(url=EXTRA_TOOLS_URL, headers={})
+    # toolExtra = CachedMCPToolset(
+    #     connection_params=_sse_params(EXTRA_TOOLS_URL),
+    #     cache_tools_list=True,
     # )
-
+    
     # =====================================
     # SPECIALIZED AGENTS CREATION
     # =====================================
@@ -491,24 +509,7 @@ async def get_agent_async():
     db_agent = LlmAgent(
         model='gemini-2.5-flash',  # CUSTOMIZE: Change model if needed (gpt-4, claude-3, etc.)
         name='YOUR_DB_AGENT_NAME',  # REPLACE: Choose a descriptive name
-        instruction="""
-            REPLACE THIS ENTIRE INSTRUCTION with your agent's role.
-            
-            TEMPLATE:
-            You are a [ROLE NAME]. Your job is to:
-            - [What this agent does - be specific]
-            - [What tools it uses]
-            - [What it should NOT do]
-            
-            EXAMPLES:
-            - Data lookup and search operations
-            - Customer information retrieval  
-            - Product catalog queries
-            - Historical data analysis
-            
-            Use your database tools to find and retrieve information.
-            You do NOT create, update, or delete data.
-        """,
+        instruction=_DB_AGENT_INSTRUCTION,  # REPLACE: text is in AGENT INSTRUCTIONS SECTION
         tools=toolDB  # Uses database tools only
     )
     
@@ -517,25 +518,8 @@ async def get_agent_async():
     api_agent = LlmAgent(
         model='gemini-2.5-flash',  # CUSTOMIZE: Change model if needed
         name='YOUR_API_AGENT_NAME',  # REPLACE: Choose a descriptive name
-        instruction="""
-            REPLACE THIS ENTIRE INSTRUCTION with your agent's role.
-            
-            TEMPLATE:
-            You are a [ROLE NAME]. Your job is to:
-            - [What actions this agent performs]
-            - [What APIs it calls]
-            - [What changes it can make]
-            
-            EXAMPLES:
-            - Send notifications and communications
-            - Process payments and transactions
-            - Update records and preferences
-            - Trigger automated workflows
-            
-            Use your API and function tools to perform actions and make changes.
-            Always confirm important actions before executing.
-        """,
-        tools=[toolFunction, toolAPI]  # Uses function and API tools
+        instruction=_API_AGENT_INSTRUCTION,  # REPLACE: text is in AGENT INSTRUCTIONS SECTION
+        tools=(toolFunction, toolAPI)  # Uses function and API tools
     )
     
     # ADD MORE AGENTS: Create additional specialists if needed
@@ -553,28 +537,13 @@ async def get_agent_async():
     root_agent = LlmAgent(
         model='gemini-2.5-flash',  # CUSTOMIZE: Change model if needed
         name='YOUR_MASTER_COORDINATOR_NAME',  # REPLACE: Name your main agent
-        instruction="""
-            REPLACE THIS ENTIRE INSTRUCTION with your coordination logic.
-            
-            TEMPLATE:
-            You are the [SYSTEM NAME] Coordinator. Your role is to analyze user requests 
-            and delegate them to the correct specialist agent.
-            
-            You command these specialists:
-            - **YOUR_DB_AGENT_NAME**: Delegate requests for [describe when to use]
-            - **YOUR_API_AGENT_NAME**: Delegate requests for [describe when to use]
-            
-            DELEGATION EXAMPLES:
-            - Questions starting with "What", "Show me", "Find" → YOUR_DB_AGENT_NAME
-            - Actions starting with "Send", "Create", "Update", "Process" → YOUR_API_AGENT_NAME
-            
-            IMPORTANT: You analyze and delegate only. You do NOT perform tasks yourself.
-        """,
-        sub_agents=[db_agent, api_agent],  # LIST: All your specialized agents
-        # sub_agents=[db_agent, api_agent, analysis_agent],  # ADD MORE: Include additional agents
+        instruction=_ROOT_AGENT_INSTRUCTION,  # REPLACE: text is in AGENT INSTRUCTIONS SECTION
+        # (fixed-size tuples are enough here: LlmAgent keeps its own list copy)
+        sub_agents=(db_agent, api_agent),  # LIST: All your specialized agents
+        # sub_agents=(db_agent, api_agent, analysis_agent),  # ADD MORE: Include additional agents
     )
     
-    print("✅ Multi-agent system created successfully.")
+    log.info("✅ Multi-agent system created successfully.")
     return root_agent
 
 # =====================================
@@ -582,32 +551,53 @@ async def get_agent_async():
 # =====================================
 # DO NOT MODIFY: This section handles proper async initialization
 async def initialize():
-    """Initializes the global root_agent safely."""
-    global root_agent
-    if root_agent is None:
-        log.info("🔄 Initializing agent system...")
-        root_agent = await get_agent_async()
-        if root_agent:
-            log.info("✅ Agent system initialized successfully.")
-        else:
-            log.error("❌ Agent system initialization failed.")
-    else:
-        log.info("ℹ️  Agent system already initialized.")
+    """
+    Initializes the global root_agent safely (from async code).
+    
+    Builds the agent the same way get_agent() does (same lock, in a worker
+    thread so the event loop keeps running), then warms it once on this
+    loop; concurrent and repeat calls share that one warm-up.
+    """
+    global _warm_task, _initialized
+    if _initialized:  # Fast path: nothing to schedule, and the log line is off by default
+        log.debug("ℹ️  Agent system already initialized.")
+        return
+    agent = _root_agent or await asyncio.to_thread(_get_or_build_agent)
+    if WARM_UP_ON_INIT:
+        if _warm_task is None:  # First caller starts it (no await since the check)
+            _warm_task = asyncio.ensure_future(_warm_agent_caches(agent))
+        await asyncio.shield(_warm_task)  # A cancelled caller doesn't stop it for the others
+    _initialized = True
 
 # =====================================
 # MODULE STARTUP EXECUTION
 # =====================================
-# DO NOT MODIFY: This starts the initialization process
-nest_asyncio.apply()
-
-log.info("🚀 Starting agent system initialization...")
-try:
-    asyncio.run(initialize())
-    log.info("✅ Module initialization completed successfully.")
-except RuntimeError as e:
-    log.error(f"⚠️  RuntimeError during initialization: {e}", exc_info=True)
-except Exception as e:
-    log.error(f"❌ Unexpected error during initialization: {e}", exc_info=True)
+# DO NOT MODIFY: Nothing is built at import time. Importing this module is
+# cheap (tests, tooling, `adk` listing agents); the agents are created the
+# first time the agent is asked for. Building opens no MCP sessions, so the
+# agent is not tied to any event loop: its sessions are opened by the loop
+# that serves requests - up front if the server awaits initialize() at
+# startup, otherwise on the first request.
+async def get_agent_async() -> LlmAgent:
+    """Builds a new agent (not the shared one) without blocking the event loop."""
+    return await asyncio.to_thread(create_agent)
+
+def _get_or_build_agent() -> LlmAgent:
+    """Returns the agent, building it once; concurrent first callers wait for that one build."""
+    global _root_agent
+    if _root_agent is None:  # Built already? Then this check is all it costs
+        with _root_agent_lock:
+            if _root_agent is None:  # Another thread may have built it while we waited
+                log.info("🚀 Starting agent system initialization...")
+                _root_agent = create_agent()
+                log.info("✅ Agent system initialized successfully.")
+    return _root_agent
+
+def __getattr__(name):
+    """`<this module>.root_agent` builds the agent on first access (PEP 562) - this is how ADK finds it."""
+    if name == "root_agent":
+        return _get_or_build_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # =====================================
 # OPTIONAL: UTILITY FUNCTIONS
@@ -616,33 +606,30 @@ except Exception as e:
 
 def get_agent():
     """
-    Synchronous wrapper to get the initialized agent.
+    Synchronous wrapper to get the agent; the first call builds it.
     CUSTOMIZE: Add error handling specific to your use case.
     """
-    global root_agent
-    if root_agent is None:
-        raise RuntimeError("❌ Agent system not initialized. Call initialize() first.")
-    return root_agent
+    return _get_or_build_agent()
 
 def is_system_ready():
     """
     Checks if the agent system is fully initialized and ready.
     CUSTOMIZE: Add additional readiness checks if needed.
     """
-    return root_agent is not None
+    return _root_agent is not None
 
 # ADD MORE UTILITIES: Create functions specific to your application
 # def restart_system():
 #     """Restarts the entire agent system."""
-#     global root_agent
-#     root_agent = None
-#     asyncio.run(initialize())
+#     global _root_agent
+#     _root_agent = None
+#     get_agent()
 
 # def get_system_status():
 #     """Returns detailed status of the agent system."""
 #     return {
-#         "initialized": root_agent is not None,
-#         "agents_count": len(root_agent.sub_agents) if root_agent else 0,
+#         "initialized": _root_agent is not None,
+#         "agents_count": len(_root_agent.sub_agents) if _root_agent else 0,
 #         "db_connected": DB_TOOLS_URL is not None,
 #         "api_connected": API_TOOLS_URL is not None
 #     }
@@ -663,12 +650,13 @@ STEP-BY-STEP CUSTOMIZATION GUIDE:
    □ Replace 'YOUR-TOOLSET-NAME' with your actual toolset from tools.yaml
    □ Update DB_TOOLS_URL, API_TOOLS_URL, FUNCTION_TOOLS_URL
    □ Add additional toolset connections if needed
+   □ Set TOOLSET_CACHE_SECONDS (how long a downloaded toolset is reused)
 
 3. AGENT CUSTOMIZATION:
    □ Replace 'YOUR_DB_AGENT_NAME' with a meaningful name
    □ Replace 'YOUR_API_AGENT_NAME' with a meaningful name  
    □ Replace 'YOUR_MASTER_COORDINATOR_NAME' with a meaningful name
-   □ Update all agent instructions with your specific roles
+   □ Update all agent instructions with your specific roles (AGENT INSTRUCTIONS SECTION)
    □ Add additional specialized agents if needed
 
 4. DELEGATION LOGIC:
@@ -679,7 +667,8 @@ STEP-BY-STEP CUSTOMIZATION GUIDE:
 5. TESTING:
    □ Verify all MCP servers are running
    □ Test database connections
-   □ Verify agent initialization
+   □ Verify agent initialization (call get_agent() once - nothing is built at import)
+   □ In a server, `await initialize()` at startup so the first request finds the MCP tool lists cached
    □ Test end-to-end workflows
 
 COMMON USE CASES:
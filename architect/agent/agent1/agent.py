@@ -21,11 +21,30 @@ import logging   # For printing debug messages
 import nest_asyncio   # For running async code in notebooks
 from typing import Optional  # For type hints
 from google.genai import types  # Google AI types
-import requests  # For making web API calls
-from datetime import datetime, timezone, timedelta  # For handling time
+import httpx  # For making web API calls without blocking the event loop
+import sqlite3  # Local record of cooldowns (survives restarts and API outages)
+import threading  # Guards the cooldown cache
+import time  # Cooldown bookkeeping in plain epoch seconds
+from concurrent.futures import ThreadPoolExecutor  # One thread for all SQLite work
+from datetime import datetime, timezone  # Reads/writes the API's ISO timestamps
 from toolbox_core import ToolboxSyncClient  # Toolbox integration
 from google.adk.agents.callback_context import CallbackContext  # Info about running agents
 
+# JSON for the Cooldown API. orjson parses and builds the small bodies faster
+# than the stdlib; without it the stdlib json module is used.
+try:
+    import orjson
+
+    loads_json = orjson.loads
+    dumps_json = orjson.dumps  # -> bytes
+except ImportError:
+    import json
+
+    loads_json = json.loads
+    dumps_json = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
 # ============================================================================
 # CONFIGURATION SECTION - CUSTOMIZE THESE VALUES
 # ============================================================================
@@ -41,7 +60,111 @@ COOLDOWN_PERIOD_SECONDS = 60  # Change this number (60 = 1 minute wait)
 # TODO: Set your cooldown API URL - this tracks when agents were last used
 # Put this URL in your .env file as API_SERVER_URL=http://your-server.com
 COOLDOWN_API_URL = os.environ.get("API_SERVER_URL")  # Gets URL from .env file
-print(f"COOLDOWN_API_URL: {COOLDOWN_API_URL}")  # Shows what URL we're using
+
+# CUSTOMIZE: Seconds to connect / to wait for an answer from the cooldown API
+COOLDOWN_API_TIMEOUT = httpx.Timeout(2.0, connect=1.0)
+
+# CUSTOMIZE: While the server is up, ping the cooldown API every N seconds so
+# a pooled connection stays open and the first check after a quiet spell
+# skips the TCP/TLS handshake. Keep N below the API server's keep-alive
+# timeout (uvicorn's default is 5 s). 0 = no pings.
+COOLDOWN_KEEPALIVE_SECONDS = float(os.environ.get("COOLDOWN_KEEPALIVE_SECONDS", "0"))
+
+# One async HTTP client for the whole process: it keeps connections to the
+# cooldown API open (no DNS lookup or TCP/TLS handshake per check), and while
+# a check waits for the API the event loop keeps serving other requests.
+# Failed connection attempts are retried twice.
+# DO NOT MODIFY unless you need different pooling or retry rules.
+_http = httpx.AsyncClient(
+    timeout=COOLDOWN_API_TIMEOUT,
+    # The limits go on the transport: a client ignores its own when given one
+    transport=httpx.AsyncHTTPTransport(
+        retries=2,
+        limits=httpx.Limits(
+            max_connections=64,
+            max_keepalive_connections=32,
+            # Idle connections are dropped after this; pings must come sooner
+            keepalive_expiry=max(5.0, 2 * COOLDOWN_KEEPALIVE_SECONDS),
+        ),
+    ),
+)
+
+# While an agent is on cooldown, repeated checks are answered from memory for
+# up to COOLDOWN_CACHE_SECONDS instead of asking the API every time.
+# agent_name -> (last_used, cached_at), both in epoch seconds (time.time())
+COOLDOWN_CACHE_SECONDS = 5
+_cooldown_cache: dict[str, tuple[float, float]] = {}
+# agent_name -> when THIS process last let it run (epoch seconds). Nothing can
+# make that agent available again before its cooldown ends, so no API call needed.
+_last_posted: dict[str, float] = {}
+_cooldown_cache_lock = threading.Lock()
+
+# --- LOCAL COOLDOWN RECORD ---
+# Optionally, every last-use time this process learns (its own runs and the
+# API's answers) is also written to a small SQLite file. When the Cooldown API
+# can't be reached, the check decides from this record instead of letting every
+# agent run, and agents still cooling down before a restart stay blocked after
+# it. Workers on the same machine can share the file.
+# The file is opened in open_resources() (server startup), and every read and
+# write runs on one worker thread, so the event loop never waits for SQLite.
+# CUSTOMIZE: Set COOLDOWN_DB_PATH=/path/to/cooldown.db in .env to turn this on
+COOLDOWN_DB_PATH = os.environ.get("COOLDOWN_DB_PATH", "")
+_db: sqlite3.Connection | None = None  # Only used on _db_thread
+_db_thread: ThreadPoolExecutor | None = None
+
+
+def _open_cooldown_db() -> None:
+    """Opens COOLDOWN_DB_PATH (runs on _db_thread) and loads the runs recorded before a restart."""
+    global _db
+    _db = sqlite3.connect(COOLDOWN_DB_PATH, timeout=1.0, isolation_level=None)
+    _db.execute("PRAGMA journal_mode=WAL")  # Readers never wait for a writer
+    _db.execute("PRAGMA synchronous=NORMAL")  # No fsync per write (WAL stays consistent)
+    _db.execute("CREATE TABLE IF NOT EXISTS cooldowns (agent TEXT PRIMARY KEY, last_used REAL NOT NULL)")
+    rows = _db.execute("SELECT agent, last_used FROM cooldowns").fetchall()
+    with _cooldown_cache_lock:
+        _last_posted.update(rows)  # Runs recorded before a restart still count
+
+
+def _close_cooldown_db() -> None:
+    """Closes the SQLite file (runs on _db_thread)."""
+    global _db
+    db, _db = _db, None
+    if db is not None:
+        db.close()
+
+
+async def _close_cooldown_record() -> None:
+    """Server shutdown: finishes pending writes, then closes the file and its thread."""
+    global _db_thread
+    db_thread, _db_thread = _db_thread, None  # No new writes from here on
+    if db_thread is not None:
+        await asyncio.get_running_loop().run_in_executor(db_thread, _close_cooldown_db)
+        db_thread.shutdown()
+
+
+def _save_last_use(agent_name: str, last_used: float) -> None:
+    """Writes one last-use time to the SQLite file (runs on _db_thread)."""
+    if _db is None:
+        return
+    try:
+        _db.execute(
+            "INSERT INTO cooldowns VALUES (?, ?) ON CONFLICT(agent) "
+            "DO UPDATE SET last_used = max(last_used, excluded.last_used)",
+            (agent_name, last_used),
+        )
+    except sqlite3.Error as e:
+        log.warning("[Callback] Could not save cooldown for '%s' locally: %s", agent_name, e)
+
+
+def _load_last_use(agent_name: str) -> float | None:
+    """Reads one last-use time from the SQLite file (runs on _db_thread)."""
+    if _db is None:
+        return None
+    try:
+        row = _db.execute("SELECT last_used FROM cooldowns WHERE agent = ?", (agent_name,)).fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
 
 # --- TOOL CONFIGURATION ---
 # Tools are external services your agents can call (like calculators, databases, etc.)
@@ -51,14 +174,13 @@ FUNCTION_TOOLS_URL = os.environ.get("FUNCTION_TOOLS_URL")  # Gets from .env file
 # TODO: Set your public URL - how others can access your agent
 PUBLIC_URL = os.environ.get("PUBLIC_URL")  # Gets from .env file
 
-# Print the URLs so you can see what's configured
-print(f"FUNCTION_TOOLS_URL: {FUNCTION_TOOLS_URL}")
-print(f"PUBLIC_URL: {PUBLIC_URL}")
-
 # --- LOGGING CONFIGURATION ---
 # This controls what debug messages get printed
+# CUSTOMIZE: level=logging.DEBUG also shows every cooldown check ([Callback] lines)
 logging.basicConfig(level=logging.INFO)  # INFO level shows important messages
 log = logging.getLogger(__name__)  # Creates a logger for this file
+# Log the URLs so you can see what's configured
+log.info("config: cooldown=%s tools=%s public=%s", COOLDOWN_API_URL, FUNCTION_TOOLS_URL, PUBLIC_URL)
 
 # --- GLOBAL VARIABLES ---
 # These will hold our main agent and resources, start as None
@@ -69,12 +191,116 @@ exit_stack: AsyncExitStack | None = None  # Will manage resources
 # COOLDOWN CALLBACK FUNCTION - PREVENTS OVERUSE OF AGENTS
 # ============================================================================
 
-def check_cool_down(callback_context: CallbackContext) -> Optional[types.Content]:
+def _cooldown_block(agent_name: str, seconds_remaining: int) -> types.Content:
+    """The message sent back instead of running an agent that is on cooldown."""
+    # TODO: Customize this message for your agent's personality
+    override_message = (
+        f"The {agent_name} is on cooldown and cannot be used right now. "
+        f"Please wait {seconds_remaining} seconds before trying again."
+    )
+    log.info("[Callback] Cooldown active for '%s'. Terminating with message.", agent_name)
+    # Return a message to user instead of running agent
+    return types.Content(parts=[types.Part(text=override_message)])
+
+
+def _remember_last_use(agent_name: str, last_used: float) -> None:
+    with _cooldown_cache_lock:
+        _cooldown_cache[agent_name] = (last_used, time.time())
+    if _db_thread is not None:  # Saved in the background: nobody waits for the write
+        _db_thread.submit(_save_last_use, agent_name, last_used)
+
+
+async def _api_unreachable(agent_name: str, error: Exception) -> Optional[types.Content]:
+    """The Cooldown API can't be reached: decide from the local record."""
+    last_used = None
+    if _db_thread is not None:
+        last_used = await asyncio.get_running_loop().run_in_executor(_db_thread, _load_last_use, agent_name)
+    if last_used is not None:
+        seconds_remaining = COOLDOWN_PERIOD_SECONDS - (time.time() - last_used)
+        if seconds_remaining > 0:
+            log.warning("[Callback] Could not reach Cooldown API (%s). Using the local record for '%s'.", error, agent_name)
+            return _cooldown_block(agent_name, int(seconds_remaining))
+    # Not cooling down as far as we know: let it run, and record the run locally
+    log.warning("[Callback] Could not reach Cooldown API. Allowing agent to run. Reason: %s", error)
+    now = time.time()
+    _remember_last_use(agent_name, now)
+    with _cooldown_cache_lock:
+        _last_posted[agent_name] = now
+    return None  # None means "let the agent run"
+
+
+def _to_epoch(timestamp) -> float:
+    """The API's timestamp (epoch seconds, or an ISO string - UTC if no zone) as epoch seconds."""
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    parsed = datetime.fromisoformat(timestamp)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+# Does the Cooldown API have the one-step acquire endpoint? (None = not asked yet)
+_acquire_supported: bool | None = None
+
+
+async def _try_acquire(agent_name: str) -> tuple[bool, int] | None:
+    """
+    Check AND record a run in one call: POST /cooldown/{agent_name}/acquire.
+    The API answers {"ok": true} (agent may run, time recorded) or
+    {"ok": false, "retry_after_s": N}. Doing both in one atomic step also
+    stops two workers from letting the same agent run at the same moment.
+    Returns (ok, retry_after_s), or None if the API has no such endpoint.
+    """
+    response = await _http.post(
+        f"{COOLDOWN_API_URL}/cooldown/{agent_name}/acquire",
+        content=dumps_json({"period_s": COOLDOWN_PERIOD_SECONDS}),
+        headers=_JSON_HEADERS,
+    )
+    if response.status_code in (404, 405):  # Older Cooldown API
+        return None
+    response.raise_for_status()
+    data = loads_json(response.content)
+    return bool(data.get("ok")), int(data.get("retry_after_s", 0))
+
+
+# Timestamp updates still in flight (kept here so they aren't garbage collected)
+_background_tasks: set[asyncio.Task] = set()
+
+
+async def _send_last_use(agent_name: str, payload: dict) -> None:
+    """Record a run in the Cooldown API; runs in the background."""
+    try:
+        # Send current time to API to record this usage
+        response = await _http.post(
+            f"{COOLDOWN_API_URL}/cooldown/{agent_name}",
+            content=dumps_json(payload),
+            headers=_JSON_HEADERS,
+        )
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        # If update fails, log the error - the agent is already running
+        log.warning("[Callback] Could not update timestamp for '%s'. Reason: %s", agent_name, e)
+
+
+async def _keep_cooldown_api_warm() -> None:
+    """Ping the Cooldown API every COOLDOWN_KEEPALIVE_SECONDS (started in open_resources)."""
+    while True:
+        await asyncio.sleep(COOLDOWN_KEEPALIVE_SECONDS)
+        try:
+            # Any answer (even a 404) keeps the connection open
+            await _http.get(f"{COOLDOWN_API_URL}/healthz")
+        except httpx.HTTPError as e:
+            log.debug("Cooldown API keepalive ping failed: %s", e)
+
+
+async def check_cool_down(callback_context: CallbackContext) -> Optional[types.Content]:
     """
     This function runs before each agent to check if it's been used too recently.
     
     HOW IT WORKS:
-    1. Checks external API to see when agent was last used
+    1. Asks the external API to check and record the run in one step
+       (older APIs without that endpoint: check when agent was last used;
+       API unreachable: use the local record in COOLDOWN_DB_PATH)
     2. If too recent, blocks the agent and sends error message
     3. If okay, updates timestamp and lets agent run
     
@@ -89,60 +315,94 @@ def check_cool_down(callback_context: CallbackContext) -> Optional[types.Content
     Returns:
         None = let agent run, Content = block agent with this message
     """
+    # No Cooldown API configured (API_SERVER_URL unset): cooldowns are off
+    if not COOLDOWN_API_URL:
+        return None
+
     # Get the name of the agent that's trying to run
     agent_name = callback_context.agent_name
-    print(f"[Callback] Before '{agent_name}': Checking cooldown status...")
-
-    # --- 1. CHECK the Cooldown API ---
+    log.debug("[Callback] Before '%s': Checking cooldown status...", agent_name)
+
+    # --- 0. Still on cooldown as far as this process knows? Skip the API call ---
+    with _cooldown_cache_lock:
+        cached = _cooldown_cache.get(agent_name)
+        last_posted = _last_posted.get(agent_name)
+    if last_posted is not None:
+        seconds_remaining = COOLDOWN_PERIOD_SECONDS - (time.time() - last_posted)
+        if seconds_remaining > 0:  # We ran it ourselves just now
+            return _cooldown_block(agent_name, int(seconds_remaining))
+    if cached:
+        last_used, cached_at = cached
+        now = time.time()
+        seconds_remaining = COOLDOWN_PERIOD_SECONDS - (now - last_used)
+        if seconds_remaining > 0 and now - cached_at < min(COOLDOWN_CACHE_SECONDS, seconds_remaining):
+            return _cooldown_block(agent_name, int(seconds_remaining))
+
+    # --- 1a. ACQUIRE via the Cooldown API (check + record in one round trip) ---
+    global _acquire_supported
+    if _acquire_supported is not False:
+        try:
+            acquired = await _try_acquire(agent_name)
+        except httpx.HTTPError as e:
+            # If API is down, fall back to the local record
+            return await _api_unreachable(agent_name, e)
+        _acquire_supported = acquired is not None
+        if acquired is not None:
+            ok, retry_after_s = acquired
+            now = time.time()
+            if not ok:
+                _remember_last_use(agent_name, now - (COOLDOWN_PERIOD_SECONDS - retry_after_s))
+                return _cooldown_block(agent_name, retry_after_s)
+            _remember_last_use(agent_name, now)
+            with _cooldown_cache_lock:
+                _last_posted[agent_name] = now
+            log.debug("[Callback] Check complete for '%s'. Proceeding with execution.", agent_name)
+            return None  # None means "proceed with agent execution"
+        log.info("[Callback] Cooldown API has no acquire endpoint - using GET + POST")
+
+    # --- 1b. CHECK the Cooldown API ---
     # Ask external service when this agent was last used
     try:
         # Make web request to check last usage time
-        response = requests.get(f"{COOLDOWN_API_URL}/cooldown/{agent_name}")
+        response = await _http.get(f"{COOLDOWN_API_URL}/cooldown/{agent_name}")
         response.raise_for_status()  # Throw error if request failed
-        data = response.json()  # Parse JSON response
-        last_used_str = data.get("time")  # Get the timestamp
-    except requests.exceptions.RequestException as e:
-        # If API is down, print error but let agent run anyway
-        print(f"[Callback] ERROR: Could not reach Cooldown API. Allowing agent to run. Reason: {e}")
-        return None  # None means "let the agent run"
+        data = loads_json(response.content)  # Parse JSON response
+        last_used_value = data.get("time")  # Get the timestamp
+    except httpx.HTTPError as e:
+        # If API is down, fall back to the local record
+        return await _api_unreachable(agent_name, e)
 
     # --- 2. EVALUATE the Cooldown Status ---
     # Check if enough time has passed since last use
-    if last_used_str:  # If we have a last-used timestamp
-        # Convert string timestamp to datetime object
-        last_used_time = datetime.fromisoformat(last_used_str)
-        # Calculate how much time has passed
-        time_since_last_use = datetime.now(timezone.utc) - last_used_time
+    if last_used_value:  # If we have a last-used timestamp
+        # Convert the timestamp to seconds since the epoch
+        last_used = _to_epoch(last_used_value)
+        _remember_last_use(agent_name, last_used)
+        # Calculate how many seconds are left to wait
+        seconds_remaining = COOLDOWN_PERIOD_SECONDS - (time.time() - last_used)
 
         # If not enough time has passed, block the agent
-        if time_since_last_use < timedelta(seconds=COOLDOWN_PERIOD_SECONDS):
-            # Calculate how many seconds left to wait
-            seconds_remaining = int(COOLDOWN_PERIOD_SECONDS - time_since_last_use.total_seconds())
-            
-            # TODO: Customize this message for your agent's personality
-            override_message = (
-                f"The {agent_name} is on cooldown and cannot be used right now. "
-                f"Please wait {seconds_remaining} seconds before trying again."
-            )
-            print(f"[Callback] Cooldown active for '{agent_name}'. Terminating with message.")
-            # Return a message to user instead of running agent
-            return types.Content(parts=[types.Part(text=override_message)])
+        if seconds_remaining > 0:
+            return _cooldown_block(agent_name, int(seconds_remaining))
 
     # --- 3. UPDATE the Cooldown API ---
     # If we get here, agent is allowed to run, so record the current time
-    current_time_iso = datetime.now(timezone.utc).isoformat()  # Get current time as string
+    current_time = time.time()
+    # The API stores ISO-8601 UTC strings (other clients read them too)
+    current_time_iso = datetime.fromtimestamp(current_time, timezone.utc).isoformat()
     payload = {"timestamp": current_time_iso}  # Package as JSON
     
-    print(f"[Callback] '{agent_name}' is available. Updating timestamp via Cooldown API...")
-    try:
-        # Send current time to API to record this usage
-        requests.post(f"{COOLDOWN_API_URL}/cooldown/{agent_name}", json=payload)
-    except requests.exceptions.RequestException as e:
-        # If update fails, print error but still let agent run
-        print(f"[Callback] ERROR: Could not update timestamp, but allowing agent to run. Reason: {e}")
+    log.debug("[Callback] '%s' is available. Updating timestamp via Cooldown API...", agent_name)
+    _remember_last_use(agent_name, current_time)  # The next check can skip the API
+    with _cooldown_cache_lock:
+        _last_posted[agent_name] = current_time
+    # Nobody reads the answer, so the agent doesn't wait for it
+    task = asyncio.create_task(_send_last_use(agent_name, payload))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
 
     # --- 4. ALLOW the agent to run ---
-    print(f"[Callback] Check complete for '{agent_name}'. Proceeding with execution.")
+    log.debug("[Callback] Check complete for '%s'. Proceeding with execution.", agent_name)
     return None  # None means "proceed with agent execution"
 
 # ============================================================================
@@ -291,6 +551,48 @@ root_agent = LoopAgent(
 #     before_agent_callback=check_cool_down  # Optional cooldown
 # )
 
+# ============================================================================
+# CLEANUP - CLOSE CONNECTIONS WHEN THE SERVER STOPS
+# ============================================================================
+# toolFunction keeps ONE session to the tools server for the whole process
+# (every agent and every call reuses it), and _http keeps connections to the
+# Cooldown API. exit_stack closes both when the server shuts down, so no SSE
+# stream or socket is left open after a stop or a --reload.
+# The server opens and closes them from the same task (its lifespan task).
+
+async def open_resources() -> None:
+    """Server startup: connect the tools and put everything on exit_stack."""
+    global exit_stack, _db_thread
+    exit_stack = AsyncExitStack()
+    if COOLDOWN_DB_PATH:
+        db_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cooldown-db")
+        try:
+            await asyncio.get_running_loop().run_in_executor(db_thread, _open_cooldown_db)
+        except sqlite3.Error as e:
+            db_thread.shutdown()
+            log.warning("Could not open COOLDOWN_DB_PATH %r (%s); local cooldown record is off", COOLDOWN_DB_PATH, e)
+        else:
+            _db_thread = db_thread
+            exit_stack.push_async_callback(_close_cooldown_record)  # Closed last
+    exit_stack.push_async_callback(_http.aclose)
+    if COOLDOWN_KEEPALIVE_SECONDS > 0 and COOLDOWN_API_URL:
+        keepalive = asyncio.create_task(_keep_cooldown_api_warm())
+        exit_stack.callback(keepalive.cancel)  # Stopped before _http closes
+    exit_stack.push_async_callback(toolFunction.close)
+    # TODO: Add toolsets you create above, e.g. exit_stack.push_async_callback(database_tools.close)
+    try:
+        await toolFunction.get_tools()  # Connect now, not on the first user request
+    except Exception as e:
+        log.warning("Tools server not reachable yet (%s); will connect on first use", e)
+
+
+async def close_resources() -> None:
+    """Server shutdown: close everything opened in open_resources()."""
+    global exit_stack
+    stack, exit_stack = exit_stack, None
+    if stack is not None:
+        await stack.aclose()
+
 # ============================================================================
 # SERVER SETUP - TURNS YOUR AGENT INTO A WEB API
 # ============================================================================
@@ -312,6 +614,10 @@ if __name__ == "__main__":
         port=PORT,      # Port number for the API
         public_url=PUBLIC_URL  # Public URL from environment variables
     )
+
+    # Connect tools at startup and close connections at shutdown (see CLEANUP)
+    a2a_app.add_event_handler("startup", open_resources)
+    a2a_app.add_event_handler("shutdown", close_resources)
     
     # Start the web server
     uvicorn.run(a2a_app, host=HOST, port=PORT)
@@ -327,6 +633,14 @@ Put these variables in it (replace the URLs with your actual URLs):
 # Optional: API server for tracking agent usage (prevents spam)
 API_SERVER_URL=http://your-cooldown-server.com
 
+# Optional: SQLite file that remembers cooldowns across restarts and API outages
+# (off unless set; use an absolute path)
+# COOLDOWN_DB_PATH=/var/lib/my-agent/cooldown.db
+
+# Optional: ping the cooldown API every N seconds to keep a connection open
+# (0 = off; keep it below the API server's keep-alive timeout)
+COOLDOWN_KEEPALIVE_SECONDS=0
+
 # Required if using tools: Where your external tools/functions are hosted
 FUNCTION_TOOLS_URL=http://your-tools-server.com
 
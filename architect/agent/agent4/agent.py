@@ -10,17 +10,50 @@
 # These libraries provide parallel processing and sequential coordination
 
 import asyncio  # Handles running multiple tasks simultaneously
+import hashlib  # Builds cache keys from model requests
+import importlib.util  # Checks whether optional packages (redis) are installed
+import json  # Serializes model requests for the cache key
 import os  # Reads environment variables from system
+import random  # Adds jitter to retry delays
+import sys  # Detects when running inside Jupyter
+import time  # Expires the cached tool lists and times the agents
+from collections import Counter, defaultdict, deque  # Rolling per-agent health samples
 from contextlib import AsyncExitStack  # Manages resource cleanup when program ends
+from contextvars import ContextVar  # Carries each request's deadline to every agent and tool
+from typing import AsyncGenerator, Literal  # Type hints for the custom parallel agent
+import httpx  # Connection errors raised by the MCP client
+from cachetools import TTLCache  # In-process cache with expiry
 from dotenv import load_dotenv  # Loads secrets and config from .env file
+from google.adk.agents.base_agent import BaseAgent  # Base class for custom agents
+from google.adk.agents.callback_context import CallbackContext  # Passed to agent and model callbacks
+from google.adk.agents.invocation_context import InvocationContext  # Per-request agent context
 from google.adk.agents.llm_agent import LlmAgent  # Creates individual AI agents
 from google.adk.agents.parallel_agent import ParallelAgent  # Runs multiple agents at the same time
 from google.adk.agents.sequential_agent import SequentialAgent  # Runs agents one after another
+from google.adk.events.event import Event  # Events produced by agents
+from google.adk.models.google_llm import Gemini  # Gemini model client
+from google.adk.models.llm_request import LlmRequest  # What an agent sends to the model
+from google.adk.models.llm_response import LlmResponse  # What the model answers
+from google.adk.tools.mcp_tool.mcp_tool import MCPTool  # One tool from an MCP server
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset  # External tools and APIs
 from google.adk.tools.mcp_tool.mcp_session_manager import SseServerParams  # Tool connection settings
+from google.adk.tools.mcp_tool.mcp_session_manager import retry_on_closed_resource  # Reconnects dropped MCP sessions
 import logging   # Prints debug and status messages
-import nest_asyncio   # Allows async code in Jupyter notebooks
-from toolbox_core import ToolboxSyncClient  # Connects to toolbox databases
+import logging.handlers  # Hands log records to a background thread
+import atexit  # Flushes queued log records at shutdown
+import queue  # Buffer between the event loop and the log writer
+from google.genai import types  # Message and generation-config types for the warm-up call
+
+# Needs Python 3.11+: the retries and the race use asyncio.timeout() and
+# exception groups (the deployment image is python:3.12-slim)
+if sys.version_info < (3, 11):
+    raise RuntimeError("This agent needs Python 3.11 or newer")
+
+# Allows async code in Jupyter notebooks. Only applied inside Jupyter: in the
+# server it would patch the event loop and disable uvloop's fast paths.
+if "ipykernel" in sys.modules:
+    import nest_asyncio
+    nest_asyncio.apply()
 
 # ============================================================================
 # ENVIRONMENT SETUP - LOADS CONFIGURATION FROM .env FILE
@@ -31,7 +64,16 @@ load_dotenv()
 # IMPORTANT: This must run before using any os.environ.get() calls
 
 # Configure logging to see what's happening during execution
-logging.basicConfig(level=logging.INFO)  # INFO level shows important events only
+# Records go into a queue and a background thread writes them out, so a slow
+# stdout/stderr pipe (container log collectors) never blocks the event loop
+_log_queue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+logging.basicConfig(
+    level=logging.INFO,  # INFO level shows important events only
+    handlers=[logging.handlers.QueueHandler(_log_queue)],
+)
+_log_listener.start()
+atexit.register(_log_listener.stop)  # Writes out whatever is still queued
 log = logging.getLogger(__name__)  # Creates logger specific to this file
 
 # ============================================================================
@@ -56,41 +98,383 @@ FUNCTION_TOOLS_URL = os.environ.get("FUNCTION_TOOLS_URL")  # Put this URL in you
 # TODO: Set your public URL (where users will access this agent system)
 PUBLIC_URL = os.environ.get("PUBLIC_URL")  # Put this URL in your .env file
 
-# Print all URLs to verify they loaded correctly from environment
-print(f"API_TOOLS_URL: {API_TOOLS_URL}")
-print(f"FUNCTION_TOOLS_URL: {FUNCTION_TOOLS_URL}")
-print(f"PUBLIC_URL: {PUBLIC_URL}")
+# CUSTOMIZE: Max tool calls in flight per tool server (per worker process).
+# Set these to what each server can actually handle; extra calls wait their turn.
+API_TOOLS_CONCURRENCY = int(os.environ.get("API_TOOLS_CONCURRENCY", "20"))
+FUNCTION_TOOLS_CONCURRENCY = int(os.environ.get("FUNCTION_TOOLS_CONCURRENCY", "20"))
+
+# CUSTOMIZE: Seconds a tool server's tool list is reused before asking again
+MCP_TOOLS_CACHE_TTL = float(os.environ.get("MCP_TOOLS_CACHE_TTL", "300"))
+
+# CUSTOMIZE: Attempts per tool call (1 = no retry) and seconds allowed per attempt.
+# Keep both small: worst case a call takes about MAX_TRIES x TIMEOUT seconds.
+MCP_TOOL_MAX_TRIES = int(os.environ.get("MCP_TOOL_MAX_TRIES", "3"))
+MCP_TOOL_TIMEOUT = float(os.environ.get("MCP_TOOL_TIMEOUT", "30"))
+
+# CUSTOMIZE: Comma-separated names of tools that are safe to run twice (lookups,
+# reads). Only these are retried after a timeout or a dropped response - any
+# other tool (e.g. one that sends a notification) is retried only when its
+# request never reached the server.
+MCP_IDEMPOTENT_TOOLS = frozenset(
+    name.strip() for name in os.environ.get("MCP_IDEMPOTENT_TOOLS", "").split(",") if name.strip()
+)
+
+# CUSTOMIZE: How long a parallel agent should normally take (milliseconds), and
+# how long an agent in RED is skipped before it gets another try (seconds)
+AGENT_LATENCY_SLO_MS = float(os.environ.get("AGENT_LATENCY_SLO_MS", "30000"))
+AGENT_RED_RETRY_AFTER = float(os.environ.get("AGENT_RED_RETRY_AFTER", "30"))
+
+# CUSTOMIZE: Model response cache. Seconds an answer is reused in this process,
+# and optionally a Redis URL (redis://host:6379/0) to share answers between
+# workers for RESPONSE_CACHE_SHARED_TTL seconds. RESPONSE_CACHE_TTL=0 turns it off.
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "300"))
+RESPONSE_CACHE_SHARED_TTL = int(os.environ.get("RESPONSE_CACHE_SHARED_TTL", "3600"))
+REDIS_URL = os.environ.get("REDIS_URL")
+
+# CUSTOMIZE: WARMUP=1 connects to the tool servers and the model at startup
+# (costs one 1-token model call per worker) so the first user request doesn't
+# pay for DNS, TLS handshakes and tool discovery
+WARMUP = os.environ.get("WARMUP") == "1"
+
+# CUSTOMIZE: Time budget for one user request, in seconds. Parallel agents and
+# tool calls still running when it's used up are cancelled, and the answer is
+# built from whatever finished in time.
+REQUEST_BUDGET_S = float(os.environ.get("REQUEST_BUDGET_S", "120"))
+
+# CUSTOMIZE: ASYNCIO_DEBUG=1 (development only) logs every callback that blocks
+# the event loop for more than 10 ms ("Executing <Task ...> took 0.150 seconds").
+# Blocking code stalls ALL concurrent requests in the worker - move it to
+# asyncio.to_thread() / loop.run_in_executor() when it shows up.
+ASYNCIO_DEBUG = os.environ.get("ASYNCIO_DEBUG") == "1"
+
+# Log all URLs (one record) to verify they loaded correctly from environment
+log.info("mcp endpoints: api=%s function=%s public=%s", API_TOOLS_URL, FUNCTION_TOOLS_URL, PUBLIC_URL)
 
 # ============================================================================
 # TOOL SETUP - CONFIGURE EXTERNAL SERVICES YOUR AGENTS CAN USE
 # ============================================================================
 
+# --- BOUNDED TOOLSETS - back-pressure toward the tool servers ---
+# The parallel agents can fire many tool calls at once. Without a limit, a
+# traffic burst is passed straight on to the tool servers and overloads them
+# (slow responses for everyone). Each toolset below lets at most
+# `max_concurrency` calls run at a time; the rest wait in line here.
+#
+# Agents also ask their toolsets for the tool list before EVERY model call,
+# which costs a round trip to the tool server each time. The list is cached
+# for MCP_TOOLS_CACHE_TTL seconds and dropped early if a tool call fails
+# (the server may have been redeployed with different tools).
+#
+# A dropped SSE connection or a server hiccup used to fail the whole parallel
+# branch. Each tool call now gets MCP_TOOL_TIMEOUT seconds per attempt and up
+# to MCP_TOOL_MAX_TRIES attempts, with a short random back-off in between.
+# By default a call is retried only if it failed to connect, i.e. the server
+# never saw it. After a timeout the server may already have run the tool, so
+# only tools listed in MCP_IDEMPOTENT_TOOLS are retried then.
+# Errors the tool itself reports (isError results) are NOT retried.
+#
+# When several agents make the SAME call (same tool, same arguments, same
+# user, session and credentials) at the same time, only one request goes to
+# the server and all of them get its result. Calls of different users or
+# sessions are never shared. Only calls that are in flight together are
+# shared - nothing is cached afterwards.
+# Every attempt is also cut short by the request's deadline (see REQUEST
+# DEADLINE below), so a slow server can't hold a slot past the user's budget.
+# DO NOT MODIFY unless you need a different limiting, caching or retry rule.
+
+# --- REQUEST DEADLINE ---
+# Set once per request by the root agent; read by the parallel group and tools.
+# (Context variables follow the request into every task it starts.)
+request_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+def start_request_clock(callback_context: CallbackContext):
+    """before_agent_callback for the root agent: starts the request's time budget."""
+    request_deadline.set(time.monotonic() + REQUEST_BUDGET_S)
+    return None  # Continue normally
+
+
+def time_left(limit: float | None = None) -> float | None:
+    """Seconds until the request deadline (capped at `limit`); None if no deadline."""
+    deadline = request_deadline.get()
+    if deadline is None:
+        return limit
+    remaining = max(0.0, deadline - time.monotonic())
+    return remaining if limit is None else min(limit, remaining)
+
+
+# Errors raised before the request left this process: always safe to retry
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, ConnectionRefusedError)
+
+
+def _was_not_sent(e: BaseException) -> bool:
+    """True if `e` (or every error in an ExceptionGroup) failed before sending."""
+    if isinstance(e, BaseExceptionGroup):
+        return all(_was_not_sent(inner) for inner in e.exceptions)
+    return isinstance(e, _NOT_SENT_ERRORS)
+
+
+async def retrying_mcp_call(coro_factory, *, attempts=3, base=0.1, cap=2.0, timeout=5.0, idempotent=False):
+    """Await coro_factory() with a per-attempt timeout, retrying failures.
+
+    Only connection errors are retried unless `idempotent` is True, in which
+    case timeouts and any other failure are retried too.
+    Waits min(cap, base * 2**attempt) plus up to `base` seconds of jitter
+    between attempts, so clients that failed together don't retry together.
+    """
+    for attempt in range(attempts):
+        try:
+            async with asyncio.timeout(time_left(timeout)):
+                return await coro_factory()
+        except Exception as e:
+            if attempt == attempts - 1 or not (idempotent or _was_not_sent(e)):
+                raise
+            log.warning("Tool call failed (%s: %s), retry %d/%d", type(e).__name__, e, attempt + 1, attempts - 1)
+            await asyncio.sleep(min(cap, base * 2 ** attempt) + random.random() * base)
+
+
+# Calls currently in flight: key -> task that every identical caller awaits
+_in_flight_calls: dict[str, asyncio.Task] = {}
+
+
+def _forget_call(key: str, task: asyncio.Task) -> None:
+    """Done-callback: drop the finished call and mark its error as seen."""
+    if _in_flight_calls.get(key) is task:
+        del _in_flight_calls[key]
+    if not task.cancelled():
+        task.exception()  # Avoids "exception was never retrieved" if every caller left
+
+
+async def singleflight(key: str, coro_factory):
+    """Run coro_factory() once for all concurrent callers using the same key."""
+    task = _in_flight_calls.get(key)
+    if task is None:
+        # The call runs in its own task, not in the first caller's: any caller
+        # (the first one too) may be cancelled - e.g. by a race, quorum or
+        # deadline - without cancelling the call for the others.
+        task = _in_flight_calls[key] = asyncio.ensure_future(coro_factory())
+        task.add_done_callback(lambda t: _forget_call(key, t))
+    return await asyncio.shield(task)
+
+class BoundedMCPTool(MCPTool):
+    """MCPTool whose calls share its toolset's concurrency limit."""
+
+    def __init__(self, *, toolset: "BoundedMCPToolset", **kwargs):
+        super().__init__(**kwargs)
+        self._toolset = toolset
+
+    async def _call_once(self, *, args, tool_context, credential):
+        # The slot is held per attempt, not while waiting to retry
+        async with self._toolset._limit:
+            return await super()._run_async_impl(
+                args=args, tool_context=tool_context, credential=credential
+            )
+
+    async def _run_async_impl(self, *, args, tool_context, credential):
+        # Only identical calls for the same user, session and credentials are
+        # shared: another user must never get this user's result
+        invocation = tool_context._invocation_context
+        headers = await self._get_headers(tool_context, credential)  # Auth headers, if any
+        key = json.dumps(
+            [id(self._toolset), self.name, invocation.user_id, invocation.session.id, headers, args],
+            sort_keys=True,
+            default=str,
+        )
+        try:
+            return await singleflight(key, lambda: retrying_mcp_call(
+                lambda: self._call_once(args=args, tool_context=tool_context, credential=credential),
+                attempts=MCP_TOOL_MAX_TRIES,
+                timeout=MCP_TOOL_TIMEOUT,
+                idempotent=self.name in MCP_IDEMPOTENT_TOOLS,
+            ))
+        except Exception:
+            self._toolset.invalidate_tools()  # Re-read the tool list next time
+            raise
+
+
+class BoundedMCPToolset(MCPToolset):
+    """MCPToolset with a concurrency limit and a cached tool list."""
+
+    def __init__(self, *, max_concurrency: int, **kwargs):
+        super().__init__(**kwargs)
+        self._limit = asyncio.Semaphore(max_concurrency)
+        self._tools_future: asyncio.Future | None = None  # Shared by concurrent callers
+        self._tools_expire_at = 0.0
+
+    def invalidate_tools(self) -> None:
+        """Forget the cached tool list; the next get_tools() fetches it again."""
+        self._tools_future = None
+
+    async def _load_tools(self) -> tuple:
+        session = await self._mcp_session_manager.create_session()
+        tools_response = await session.list_tools()
+        return tuple(
+            BoundedMCPTool(
+                toolset=self,
+                mcp_tool=tool,
+                mcp_session_manager=self._mcp_session_manager,
+                auth_scheme=self._auth_scheme,
+                auth_credential=self._auth_credential,
+            )
+            for tool in tools_response.tools
+        )
+
+    @retry_on_closed_resource
+    async def get_tools(self, readonly_context=None):
+        tools_future = self._tools_future
+        if tools_future is not None and time.monotonic() < self._tools_expire_at:
+            # Cached, or being fetched by another agent right now: share its result.
+            # shield() - a cancelled caller must not cancel the shared fetch.
+            tools = await asyncio.shield(tools_future)
+        else:
+            # This caller fetches (in its own task, where the MCP session lives);
+            # agents asking in the meantime wait for the same result
+            tools_future = self._tools_future = asyncio.get_running_loop().create_future()
+            self._tools_expire_at = time.monotonic() + MCP_TOOLS_CACHE_TTL
+            try:
+                tools = await self._load_tools()
+            except BaseException as e:
+                if self._tools_future is tools_future:
+                    self._tools_future = None  # Never cache a failure
+                tools_future.set_exception(
+                    e if isinstance(e, Exception) else ConnectionError("tool list fetch was cancelled")
+                )
+                tools_future.exception()  # Mark as seen in case nobody else was waiting
+                raise
+            tools_future.set_result(tools)
+        return [tool for tool in tools if self._is_tool_selected(tool, readonly_context)]
+
+
 # --- FIRST TOOLSET - API-based tools ---
 # TODO: Configure your API tools (web APIs, data services, etc.)
-toolFAPI = MCPToolset(
+toolFAPI = BoundedMCPToolset(
     # Connection parameters for your API tools server
     connection_params=SseServerParams(
         url=API_TOOLS_URL,  # Your API tools server URL
         headers={}  # Add authentication headers if needed: {"Authorization": "Bearer token"}
-    )
+    ),
+    max_concurrency=API_TOOLS_CONCURRENCY,  # Max calls in flight to this server
 )
 
 # --- SECOND TOOLSET - Function/compute tools ---  
 # TODO: Configure your function tools (calculations, processing, etc.)
-toolFunction = MCPToolset(
+toolFunction = BoundedMCPToolset(
     # Connection parameters for your function tools server
     connection_params=SseServerParams(
         url=FUNCTION_TOOLS_URL,  # Your function tools server URL
         headers={}  # Add authentication headers if needed
-    )
+    ),
+    max_concurrency=FUNCTION_TOOLS_CONCURRENCY,  # Max calls in flight to this server
 )
 
 # TODO: Add more toolsets if you have additional tool servers
 # Example:
-# database_tools = MCPToolset(
-#     connection_params=SseServerParams(url=DATABASE_TOOLS_URL, headers={})
+# database_tools = BoundedMCPToolset(
+#     connection_params=SseServerParams(url=DATABASE_TOOLS_URL, headers={}),
+#     max_concurrency=10,
 # )
 
+# ============================================================================
+# RESPONSE CACHE - REUSE MODEL ANSWERS FOR REPEATED QUESTIONS
+# ============================================================================
+# Many questions repeat (same market, same stock, same report). When an agent
+# sends the model exactly the same conversation again, the stored answer is
+# returned instead of calling the model: microseconds instead of seconds.
+#   Tier 1: in-process TTLCache (RESPONSE_CACHE_TTL, 1024 entries)
+#   Tier 2: Redis, shared by all workers (only if REDIS_URL is set and the
+#           `redis` package is installed: pip install redis)
+# The key covers the model, the request config (instruction, tools,
+# temperature and other generation params) and the whole conversation
+# including tool results, so fresh tool data means a fresh answer.
+# DO NOT MODIFY unless you need a different cache key or storage.
+
+class ResponseCache:
+    """Two-tier model response cache, plugged in as before/after model callbacks."""
+
+    def __init__(self, *, ttl: float, shared_ttl: int, redis_url: str | None = None, maxsize: int = 1024):
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl) if ttl > 0 else None
+        self._shared_ttl = shared_ttl
+        self._redis = None
+        if self._local is not None and redis_url:
+            if importlib.util.find_spec("redis"):
+                import redis.asyncio as aioredis
+                self._redis = aioredis.from_url(redis_url)
+            else:
+                log.warning("REDIS_URL is set but redis isn't installed - caching in-process only")
+        # Key of the request each agent is waiting on, so after_model can store the answer
+        self._in_flight = TTLCache(maxsize=10_000, ttl=600)
+
+    @staticmethod
+    def _key(llm_request: LlmRequest) -> str:
+        # Function call ids are random per run - leave them out of the key
+        turns = []
+        for content in llm_request.contents:
+            for part in content.parts or ():
+                if part.function_call:
+                    turns.append((content.role, "call", part.function_call.name, part.function_call.args))
+                elif part.function_response:
+                    turns.append((content.role, "result", part.function_response.name, part.function_response.response))
+                elif part.text:
+                    turns.append((content.role, "text", part.text))
+        # The config holds the instruction, tool declarations and generation
+        # params (temperature, ...) - any change there must miss the cache
+        config = (
+            llm_request.config.model_dump(mode="json", exclude_none=True, exclude={"http_options"})
+            if llm_request.config else None
+        )
+        payload = json.dumps([llm_request.model, config, turns], sort_keys=True, default=str)
+        return "llm-response:" + hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    async def before_model(self, callback_context: CallbackContext, llm_request: LlmRequest):
+        if self._local is None:
+            return None
+        key = self._key(llm_request)
+        cached = self._local.get(key)
+        if cached is None and self._redis is not None:
+            try:
+                cached = await self._redis.get(key)
+            except Exception as e:  # Redis down - just call the model
+                log.warning("Response cache: redis get failed: %s", e)
+            if cached is not None:
+                self._local[key] = cached
+        if cached is not None:
+            return LlmResponse.model_validate_json(cached)  # Skips the model call
+        self._in_flight[(callback_context.invocation_id, callback_context.agent_name)] = key
+        return None
+
+    async def after_model(self, callback_context: CallbackContext, llm_response: LlmResponse):
+        if llm_response.partial or llm_response.error_code or not llm_response.content:
+            return None  # Only complete, successful answers are worth reusing
+        key = self._in_flight.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if key is None:
+            return None
+        value = llm_response.model_dump_json(exclude_none=True)
+        self._local[key] = value
+        if self._redis is not None:
+            try:
+                await self._redis.set(key, value, ex=self._shared_ttl)
+            except Exception as e:
+                log.warning("Response cache: redis set failed: %s", e)
+        return None
+
+    async def aclose(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+response_cache = ResponseCache(
+    ttl=RESPONSE_CACHE_TTL, shared_ttl=RESPONSE_CACHE_SHARED_TTL, redis_url=REDIS_URL
+)
+
+# ============================================================================
+# MODEL - ONE CLIENT SHARED BY ALL AGENTS
+# ============================================================================
+# An agent given a model NAME ('gemini-2.5-flash') builds a new client, with
+# new connections, for every model call. One shared client keeps its
+# connections open between calls and agents (and can be warmed up at startup).
+# TODO: Choose the AI model for your agents
+gemini_flash = Gemini(model='gemini-2.5-flash')
+
 # ============================================================================
 # PARALLEL AGENTS - THESE RUN SIMULTANEOUSLY TO GATHER DIFFERENT DATA
 # ============================================================================
@@ -98,8 +482,8 @@ toolFunction = MCPToolset(
 # --- FIRST PARALLEL AGENT - Data Collector 1 ---
 # TODO: Replace with your first parallel worker
 first_parallel_agent = LlmAgent(
-    # TODO: Choose AI model for this agent
-    model='gemini-2.5-flash',
+    # TODO: Choose AI model for this agent (a model name string also works)
+    model=gemini_flash,
     
     # TODO: Name this agent based on what it collects/processes
     name='data_collector_1',  # Change to match your use case
@@ -120,14 +504,18 @@ first_parallel_agent = LlmAgent(
     """,
     
     # TODO: Assign tools this agent needs (choose from toolsets above)
-    tools=[toolFAPI]  # This agent uses API tools
+    tools=[toolFAPI],  # This agent uses API tools
+
+    # Reuse answers to repeated questions (see RESPONSE CACHE above)
+    before_model_callback=response_cache.before_model,
+    after_model_callback=response_cache.after_model,
 )
 
 # --- SECOND PARALLEL AGENT - Data Collector 2 ---
 # TODO: Replace with your second parallel worker  
 second_parallel_agent = LlmAgent(
-    # TODO: Choose AI model for this agent
-    model='gemini-2.5-flash',
+    # TODO: Choose AI model for this agent (a model name string also works)
+    model=gemini_flash,
     
     # TODO: Name this agent based on what it collects/processes
     name='data_collector_2',  # Change to match your use case
@@ -149,6 +537,10 @@ second_parallel_agent = LlmAgent(
     
     # TODO: Assign tools this agent needs
     tools=[toolFunction],  # This agent uses function tools
+
+    # Reuse answers to repeated questions (see RESPONSE CACHE above)
+    before_model_callback=response_cache.before_model,
+    after_model_callback=response_cache.after_model,
 )
 
 # TODO: Add more parallel agents if you need additional concurrent processing
@@ -160,15 +552,199 @@ second_parallel_agent = LlmAgent(
 #     tools=[database_tools]
 # )
 
+# ============================================================================
+# AGENT HEALTH - LATENCY AND SUCCESS TRACKING FOR THE PARALLEL AGENTS
+# ============================================================================
+# Every run of a parallel agent is recorded (how long it took, did it fail).
+# From the last 50 runs each agent gets a condition code:
+#   GREEN  - healthy
+#   YELLOW - a few failures, or slower than AGENT_LATENCY_SLO_MS
+#   ORANGE - many failures, or more than twice as slow as the SLO
+#   RED    - mostly failing, or failed 3 times in a row
+# The parallel group skips RED agents (one try every AGENT_RED_RETRY_AFTER
+# seconds tells when they recover). See it live at GET /health/agents.
+# DO NOT MODIFY unless you need different thresholds.
+
+class HealthTracker:
+    """Rolling (latency_ms, ok) samples per agent, summarised as a condition code."""
+
+    def __init__(self, window: int = 50):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._consecutive_errors = Counter()
+        self._last_run = {}  # Agent name -> time.monotonic() of its last recorded run
+
+    def record(self, name: str, latency_ms: float, ok: bool) -> None:
+        self._samples[name].append((latency_ms, ok))
+        self._consecutive_errors[name] = 0 if ok else self._consecutive_errors[name] + 1
+        self._last_run[name] = time.monotonic()
+
+    def stats(self, name: str) -> dict:
+        samples = self._samples.get(name) or ()
+        latencies = sorted(latency for latency, _ in samples)
+        success_rate = sum(ok for _, ok in samples) / len(samples) if samples else 1.0
+        # The rate only counts once there are a few runs (one early failure isn't RED)
+        rate = success_rate if len(samples) >= 5 else 1.0
+        p95 = latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0
+        errors = self._consecutive_errors[name]
+        if errors >= 3 or rate < 0.5:
+            condition = "RED"
+        elif rate < 0.8 or p95 > 2 * AGENT_LATENCY_SLO_MS:
+            condition = "ORANGE"
+        elif rate < 0.95 or p95 > AGENT_LATENCY_SLO_MS:
+            condition = "YELLOW"
+        else:
+            condition = "GREEN"
+        return {
+            "condition": condition,
+            "success_rate": round(success_rate, 3),
+            "p95_latency_ms": round(p95, 1),
+            "consecutive_errors": errors,
+            "samples": len(samples),
+        }
+
+    def should_skip(self, name: str) -> bool:
+        """True for a RED agent, except for one retry every AGENT_RED_RETRY_AFTER seconds."""
+        if self.stats(name)["condition"] != "RED":
+            return False
+        if time.monotonic() - self._last_run[name] < AGENT_RED_RETRY_AFTER:
+            return True
+        self._last_run[name] = time.monotonic()  # Let exactly one run through as a probe
+        return False
+
+    def snapshot(self) -> dict:
+        return {name: self.stats(name) for name in self._samples}
+
+
+# One tracker for the whole process (every RaceParallelAgent reports here)
+agent_health = HealthTracker()
+
+
+# ============================================================================
+# RACE PARALLEL AGENT - PARALLEL GROUP THAT CAN STOP AT THE FIRST ANSWER
+# ============================================================================
+
+class RaceParallelAgent(BaseAgent):
+    """
+    Runs its sub-agents at the same time, like ParallelAgent, but lets you
+    choose when the group is done:
+
+    - mode="first": done as soon as ONE sub-agent finishes without an error;
+      the others are cancelled. The group takes as long as the FASTEST agent.
+      Use it when any single collector's answer is enough.
+    - mode="all": wait for every sub-agent (the group takes as long as the
+      SLOWEST agent), but one failing agent no longer aborts the others.
+    - quorum=N (optional, overrides mode): done once N sub-agents finished
+      without an error, so the next step can start without the stragglers.
+
+    Either way the group only fails if every sub-agent failed.
+    Sub-agents that are currently RED in `agent_health` are skipped (unless
+    all of them are RED).
+    DO NOT MODIFY unless you need different stopping rules.
+    """
+
+    mode: Literal["first", "all"] = "first"
+    quorum: int | None = None
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        # Leave out agents that keep failing or timing out
+        sub_agents = [a for a in self.sub_agents if not agent_health.should_skip(a.name)]
+        if not sub_agents:
+            sub_agents = self.sub_agents  # All RED - better to try than to answer nothing
+        elif len(sub_agents) < len(self.sub_agents):
+            log.warning("%s: skipping RED agent(s), running %s", self.name, [a.name for a in sub_agents])
+
+        if self.quorum is not None:
+            needed = min(self.quorum, len(sub_agents))
+        else:
+            needed = 1 if self.mode == "first" else len(sub_agents)
+
+        # Each sub-agent gets its own branch, exactly like ParallelAgent
+        runs = {}
+        for sub_agent in sub_agents:
+            branch_ctx = ctx.model_copy()
+            branch_suffix = f"{self.name}.{sub_agent.name}"
+            branch_ctx.branch = f"{ctx.branch}.{branch_suffix}" if ctx.branch else branch_suffix
+            runs[sub_agent.name] = sub_agent.run_async(branch_ctx)
+
+        # One task per sub-agent runs that agent's whole event stream and hands
+        # each event over through `events`. Every step of a sub-agent runs in
+        # the same task, so the context variables it sets (tracing spans, the
+        # request deadline) are also reset there. An agent only moves on after
+        # its previous event was passed up to the runner.
+        events: asyncio.Queue = asyncio.Queue()
+
+        async def run_to_end(name, run):
+            try:
+                async for event in run:
+                    passed_up = asyncio.Event()
+                    events.put_nowait((name, event, passed_up))
+                    await passed_up.wait()
+            except Exception as e:  # Reported below; the other agents keep going
+                events.put_nowait((name, e, None))
+            else:
+                events.put_nowait((name, None, None))  # Finished successfully
+            finally:
+                await run.aclose()  # Same task as the steps (no-op if it already ended)
+
+        tasks = [asyncio.create_task(run_to_end(name, run)) for name, run in runs.items()]
+        running = set(runs)
+        started = time.monotonic()
+        errors = []
+        finished = 0
+        try:
+            while running:
+                try:
+                    async with asyncio.timeout(time_left()):
+                        name, item, passed_up = await events.get()
+                except TimeoutError:  # Request deadline reached - go on with what finished in time
+                    for name in running:
+                        agent_health.record(name, (time.monotonic() - started) * 1000, ok=False)
+                    log.warning("%s: deadline reached, cancelling %s", self.name, sorted(running))
+                    if not finished:
+                        raise TimeoutError(f"{self.name}: no sub-agent finished before the deadline") from None
+                    return
+                if passed_up is not None:  # An event: pass it up, then let the agent continue
+                    yield item
+                    passed_up.set()
+                    continue
+                running.discard(name)
+                elapsed_ms = (time.monotonic() - started) * 1000
+                if item is None:  # This sub-agent finished successfully
+                    agent_health.record(name, elapsed_ms, ok=True)
+                    finished += 1
+                    if finished >= needed and running:
+                        log.info("%s: %d answer(s) in, cancelling the rest", self.name, finished)
+                        return
+                else:  # This sub-agent failed - keep the others going
+                    agent_health.record(name, elapsed_ms, ok=False)
+                    log.warning("%s: sub-agent '%s' failed: %s", self.name, name, item)
+                    errors.append(item)
+        finally:
+            # Cancel the losers; each task closes its own sub-agent run
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if errors and len(errors) == len(runs):
+            raise errors[0]
+
+
 # ============================================================================
 # PARALLEL COORDINATION - GROUPS AGENTS THAT RUN SIMULTANEOUSLY  
 # ============================================================================
 
 # TODO: Configure which agents run in parallel
-parallel_group = ParallelAgent(
+parallel_group = RaceParallelAgent(
     # TODO: Name your parallel processing group
     name='parallel_data_collectors',  # Change to describe what these agents do together
     
+    # CUSTOMIZE: "all" = wait for every agent (the synthesizer below needs both
+    # results); "first" = continue with the first answer and cancel the rest
+    mode="all",
+    # CUSTOMIZE: With many collectors, set quorum=N to hand over to the
+    # synthesizer as soon as N of them answered (cuts the wait for the slowest)
+    # quorum=2,
+    
     # TODO: List all agents that should run at the same time
     sub_agents=[
         first_parallel_agent,   # Runs simultaneously with second_parallel_agent
@@ -178,7 +754,8 @@ parallel_group = ParallelAgent(
     
     # NOTE: All agents in this group will start at the same time
     # Each gets the same input, but they work independently
-    # Results from all agents are collected before moving to next step
+    # With mode="all", results from all agents are collected before moving to next step
+    # (ParallelAgent(name=..., sub_agents=[...]) also works if you don't need modes)
 )
 
 # ============================================================================
@@ -188,8 +765,8 @@ parallel_group = ParallelAgent(
 # --- RESULTS PROCESSOR - Handles output from parallel agents ---
 # TODO: Replace with your results processing logic
 results_processor = LlmAgent(
-    # TODO: Choose AI model for processing results
-    model='gemini-2.5-flash',
+    # TODO: Choose AI model for processing results (a model name string also works)
+    model=gemini_flash,
     
     # TODO: Name this agent based on its processing role
     name='results_synthesizer',  # Change to match what it does with parallel results
@@ -217,6 +794,10 @@ results_processor = LlmAgent(
     
     # TODO: Assign tools this processor needs
     tools=[toolFunction],  # This agent uses function tools for processing
+
+    # Reuse answers to repeated questions (see RESPONSE CACHE above)
+    before_model_callback=response_cache.before_model,
+    after_model_callback=response_cache.after_model,
 )
 
 # TODO: Add more sequential processors if you need multi-step processing
@@ -245,7 +826,10 @@ root_agent = SequentialAgent(
     ],
     
     # TODO: Add description of what your complete system accomplishes
-    description="Runs parallel data collection followed by sequential result synthesis"
+    description="Runs parallel data collection followed by sequential result synthesis",
+
+    # Starts the per-request time budget (REQUEST_BUDGET_S)
+    before_agent_callback=start_request_clock,
 )
 
 # ============================================================================
@@ -278,15 +862,76 @@ root_agent = SequentialAgent(
 # )
 
 # ============================================================================
-# SERVER DEPLOYMENT - EXPOSE YOUR SYSTEM AS A WEB API
+# RESOURCE LIFECYCLE - OPEN AT STARTUP, CLOSE CLEANLY AT SHUTDOWN
 # ============================================================================
+# exit_stack owns everything that holds a connection: the MCP sessions of both
+# toolsets and the response cache's Redis client. On shutdown (SIGTERM,
+# Ctrl+C, --reload) uvicorn stops accepting requests, lets in-flight ones
+# finish, then runs close_resources() - no leaked SSE connections.
+# DO NOT MODIFY - add new resources in open_resources() instead.
+
+async def open_resources() -> None:
+    """Startup handler: register every resource that must be closed."""
+    global exit_stack
+    if ASYNCIO_DEBUG:
+        loop = asyncio.get_running_loop()
+        loop.set_debug(True)
+        loop.slow_callback_duration = 0.01  # Report anything blocking 10 ms or more
+        logging.getLogger("asyncio").setLevel(logging.WARNING)
+    exit_stack = AsyncExitStack()
+    # Closed in reverse order: toolsets first (last opened first), then the cache
+    exit_stack.push_async_callback(response_cache.aclose)
+    exit_stack.push_async_callback(toolFAPI.close)
+    exit_stack.push_async_callback(toolFunction.close)
+    # TODO: Register toolsets you add above, e.g. exit_stack.push_async_callback(database_tools.close)
+    if WARMUP:
+        await warm_up()
+
+
+async def warm_up() -> None:
+    """Open tool sessions, fetch tool lists and make a 1-token model call."""
+    async def ping_model():
+        request = LlmRequest(
+            model=gemini_flash.model,
+            contents=[types.Content(role="user", parts=[types.Part(text="ping")])],
+            config=types.GenerateContentConfig(max_output_tokens=1),
+        )
+        async for _ in gemini_flash.generate_content_async(request):
+            pass
+
+    started = time.monotonic()
+    model_warm_up = asyncio.create_task(ping_model())  # Runs while the tools connect
+    # Tool sessions are opened right here (not in extra tasks): they must be
+    # closed by the same task at shutdown.
+    # TODO: Add toolsets you add above, e.g. ("database tools", database_tools)
+    for what, warm_up_step in (
+        ("api tools", toolFAPI.get_tools),
+        ("function tools", toolFunction.get_tools),
+        ("model", lambda: model_warm_up),
+    ):
+        try:
+            await warm_up_step()
+        except Exception as e:  # A failed warm-up must not stop the server
+            log.warning("Warm-up of %s failed: %s", what, e)
+    log.info("Warm-up done in %.2fs", time.monotonic() - started)
+
+
+async def close_resources() -> None:
+    """Shutdown handler: close everything registered in open_resources()."""
+    global exit_stack
+    stack, exit_stack = exit_stack, None  # /health/agents reports 503 from here on
+    if stack is not None:
+        await stack.aclose()
 
-# Import the agent-to-API converter
-from agent_to_a2a import to_a2a
+# ============================================================================
+# SERVER DEPLOYMENT - EXPOSE YOUR SYSTEM AS A WEB API
+# ============================================================================
 
 # This section runs when you execute the file directly
+# (server-only imports live here so `adk web` / notebooks don't load them)
 if __name__ == "__main__":
     import uvicorn  # Fast Python web server
+    from agent_to_a2a import to_a2a  # Converts the agent into a web API
     
     # TODO: Customize server deployment settings
     SERVER_PORT = 8080  # Change if you need a different port number
@@ -296,11 +941,35 @@ if __name__ == "__main__":
     a2a_app = to_a2a(
         root_agent,        # Your complete parallel-sequential system
         port=SERVER_PORT,  # Port number for the API server
-        public_url=PUBLIC_URL  # Public URL from environment variables
+        public_url=PUBLIC_URL,  # Public URL from environment variables
+        streaming=True,  # Users see the synthesized report as it is written
     )
+
+    # Health of each parallel agent (condition code, success rate, p95 latency).
+    # Answers 503 once shutdown started, so load balancers stop sending traffic.
+    from starlette.responses import JSONResponse
+
+    async def health_agents(request):
+        status = 200 if exit_stack is not None else 503
+        return JSONResponse({"agents": agent_health.snapshot()}, status_code=status)
+
+    a2a_app.add_route("/health/agents", health_agents, methods=["GET"])
+
+    # Open/close the toolsets and cache with the server (see RESOURCE LIFECYCLE)
+    a2a_app.add_event_handler("startup", open_resources)
+    a2a_app.add_event_handler("shutdown", close_resources)
     
     # Start the web server (your parallel processing system is now live!)
-    uvicorn.run(a2a_app, host=SERVER_HOST, port=SERVER_PORT)
+    # uvloop + httptools: faster event loop and HTTP parser for this I/O-bound
+    # server (every request is mostly waiting on tool servers and the LLM).
+    # ASYNCIO_DEBUG uses the standard loop: only it reports slow callbacks.
+    uvicorn.run(
+        a2a_app,
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        loop="asyncio" if ASYNCIO_DEBUG else "uvloop",
+        http="httptools",
+    )
     # Users can now send requests that trigger parallel processing
 
 # ============================================================================
@@ -316,6 +985,29 @@ API_TOOLS_URL=http://api-tools.mycompany.com
 # Second tool server (typically computation and processing tools)
 FUNCTION_TOOLS_URL=http://function-tools.mycompany.com
 
+# Optional: max tool calls in flight per tool server (default 20 each)
+# API_TOOLS_CONCURRENCY=20
+# FUNCTION_TOOLS_CONCURRENCY=20
+# Optional: seconds to reuse each tool server's tool list (default 300)
+# MCP_TOOLS_CACHE_TTL=300
+# Optional: attempts per tool call and seconds per attempt (defaults 3 and 30)
+# MCP_TOOL_MAX_TRIES=3
+# MCP_TOOL_TIMEOUT=30
+# MCP_IDEMPOTENT_TOOLS=your_first_function,your_data_function
+# Optional: expected parallel-agent time in ms, and seconds a RED agent is skipped
+# AGENT_LATENCY_SLO_MS=30000
+# AGENT_RED_RETRY_AFTER=30
+# Optional: model response cache (seconds; 0 = off) and Redis to share it between workers
+# RESPONSE_CACHE_TTL=300
+# RESPONSE_CACHE_SHARED_TTL=3600
+# REDIS_URL=redis://localhost:6379/0
+# Optional: connect to tool servers and the model before the first request
+# WARMUP=1
+# Optional: time budget per user request in seconds (default 120)
+# REQUEST_BUDGET_S=120
+# Development only: log anything that blocks the event loop for 10 ms or more
+# ASYNCIO_DEBUG=1
+
 # Public URL where users can access your parallel processing system
 PUBLIC_URL=http://parallel-processor.mycompany.com
 
@@ -24,11 +24,32 @@ from google.adk.agents.base_agent import BaseAgent
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.models.llm_request import LlmRequest
 from google.adk.plugins.base_plugin import BasePlugin
-from typing import Optional
+from typing import Mapping, Optional
 from google.genai import types
-import requests
+import asyncio
+import httpx
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache
+import logging
 import os
+import threading
+import time
+from types import MappingProxyType
+
+# JSON for the cooldown API. orjson reads and writes the small bodies faster
+# than the stdlib; without it the stdlib json module is used.
+try:
+    import orjson
+
+    loads_json = orjson.loads
+    dumps_json = orjson.dumps  # -> bytes
+except ImportError:
+    import json
+
+    loads_json = json.loads
+    dumps_json = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
 
 # ===== CONFIGURATION SECTION =====
 # CUSTOMIZE THESE VALUES FOR YOUR USE CASE:
@@ -43,7 +64,30 @@ COOLDOWN_PERIOD_SECONDS = 60  # Replace 60 with your desired cooldown time
 # This should point to your server that tracks cooldown states
 # Example: "https://your-api.com/cooldown" or "http://localhost:8000/api/cooldown"
 COOLDOWN_API_URL = os.environ.get("API_SERVER_URL")  # Replace with your API URL
-print(f"COOLDOWN_API_URL: {COOLDOWN_API_URL}")
+
+# Without COOLDOWN_API_URL every request is allowed. Set this to True to
+# enforce COOLDOWN_PERIOD_SECONDS in this process instead (single-instance
+# deployments only: other servers don't see these cooldowns).
+COOLDOWN_ENFORCE_LOCALLY = False
+
+log = logging.getLogger(__name__)
+log.debug("cooldown api=%s", COOLDOWN_API_URL)
+
+# Seconds an "in cooldown" answer from the API is reused before asking again.
+# Keeps a user who retries quickly from costing one API call per request.
+COOLDOWN_CACHE_SECONDS = 5  # 0 = always ask the API
+
+# Seconds allowed actions are collected before they are sent to the API
+# together in one POST /record_batch (at most COOLDOWN_RECORD_BATCH_SIZE per
+# POST). Busy servers then make one record call per interval, not one per
+# request. APIs without /record_batch get one POST /record per action.
+COOLDOWN_RECORD_FLUSH_SECONDS = 0.1  # 0 = send each record right away
+COOLDOWN_RECORD_BATCH_SIZE = 256
+
+# Expired entries are dropped from the local cooldown tables once they hold
+# at least this many users (and again each time the table has doubled since),
+# so memory follows the number of users active within one cooldown period.
+COOLDOWN_TABLE_SWEEP_AT = 1024
 
 # [PLACEHOLDER 3] - Additional Configuration
 # Add any other configuration variables you need:
@@ -67,7 +111,25 @@ class CooldownPlugin(BasePlugin):
     - API integration methods
     - Error handling and responses
     """
-    
+
+    # The attributes read on every request get fixed slots instead of
+    # instance-dict entries. BasePlugin still gives instances a __dict__,
+    # so attributes you add in your customizations keep working as usual.
+    # CUSTOMIZE: list new hot-path attributes here too
+    __slots__ = (
+        "_fast_allow",
+        "_client",
+        "_cooldown_until",
+        "_last_action",
+        "_sweep_at",
+        "_cooldown_lock",
+        "_acquire_supported",
+        "_background_tasks",
+        "_pending_records",
+        "_flush_task",
+        "_record_batch_supported",
+    )
+
     def __init__(self):
         """
         Initialize the plugin.
@@ -80,11 +142,65 @@ class CooldownPlugin(BasePlugin):
         - Load configuration files
         """
         super().__init__()
+
+        # Nothing to enforce (no API, and no local cooldown asked for)? Then
+        # every request passes after a single attribute check - see on_agent_request.
+        self._fast_allow = not COOLDOWN_API_URL and (
+            not COOLDOWN_ENFORCE_LOCALLY or COOLDOWN_PERIOD_SECONDS <= 0
+        )
+
+        # One async HTTP client for the plugin's lifetime: its pool keeps
+        # connections to the cooldown API open, so checks after the first
+        # skip the TCP/TLS handshake, and while a check waits for the API
+        # the event loop keeps serving other users. Errors are not retried
+        # here - the check must answer quickly, and failures are handled below.
+        # CUSTOMIZE: max_connections = how many requests may talk to the API at once
+        self._client = httpx.AsyncClient(
+            timeout=5,  # Adjust timeout as needed
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        )
+
+        # Local cooldown state: two tables of time.monotonic() values, keyed
+        # by user_id (no entry = nothing known; expired entries are dropped).
+        # _cooldown_until: until when the user is known to be in cooldown,
+        # so the check can answer without the API. Set for
+        # COOLDOWN_PERIOD_SECONDS when this process records an action, and
+        # for COOLDOWN_CACHE_SECONDS when the API says "in cooldown".
+        # Only "in cooldown" is remembered: an allowed request is recorded
+        # right away, and another server may record one at any moment.
+        # _last_action: the user's last action, as recorded by this process
+        # or reported by /acquire; the remaining wait is worked out from it.
+        self._cooldown_until: dict[str, float] = {}
+        self._last_action: dict[str, float] = {}
+        self._sweep_at = COOLDOWN_TABLE_SWEEP_AT  # Table size that triggers the next sweep
+        self._cooldown_lock = threading.Lock()
+
+        # Does the API have the one-step /acquire endpoint? (None = not asked yet)
+        self._acquire_supported: Optional[bool] = None
+
+        # Record POSTs still in flight (kept here so they aren't garbage collected)
+        self._background_tasks: set[asyncio.Task] = set()
+        # Actions waiting for the next batch: (user_id, ISO timestamp)
+        self._pending_records: list[tuple[str, str]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        # Does the API have POST /record_batch? (None = not asked yet)
+        self._record_batch_supported: Optional[bool] = None
+
+        # Created inside a running server? Open the first API connection
+        # now, so the first user's check doesn't pay for DNS + TCP + TLS.
+        # (Created at import time: call `await plugin.warm_up()` at startup.)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:  # No event loop running yet
+            pass
+        else:
+            self._spawn(self.warm_up())
+
         # Add your initialization code here
         # Example: self.logger = logging.getLogger(__name__)
         # Example: self.db_connection = connect_to_database()
     
-    def on_agent_request(
+    async def on_agent_request(
         self, 
         agent: BaseAgent, 
         request: LlmRequest, 
@@ -111,6 +227,8 @@ class CooldownPlugin(BasePlugin):
         - Add custom validation rules
         - Integrate with your specific API or database
         """
+        if self._fast_allow:  # Cooldown switched off: runs before every LLM call, so do nothing
+            return request
         
         # [PLACEHOLDER 7] - User Identification
         # Extract user identifier from the request
@@ -124,16 +242,28 @@ class CooldownPlugin(BasePlugin):
             return request  # Or return None to block
         
         # [PLACEHOLDER 9] - Cooldown Check
+        # One POST /acquire checks AND records the action. APIs without that
+        # endpoint get the separate check + record below.
+        acquired = None if self._known_in_cooldown(user_id) else await self._try_acquire(user_id)
+        if acquired is not None:
+            if not acquired:
+                await self._handle_cooldown_violation(agent, request, context, user_id)
+                return None  # Block the request
+            return request  # Allowed, and already recorded
+        
         # Check if user is in cooldown period
-        if self._is_user_in_cooldown(user_id):
+        if await self._is_user_in_cooldown(user_id):
             # [PLACEHOLDER 10] - Cooldown Response
             # Customize what happens when user is in cooldown
-            self._handle_cooldown_violation(agent, request, context, user_id)
+            await self._handle_cooldown_violation(agent, request, context, user_id)
             return None  # Block the request
         
         # [PLACEHOLDER 11] - Record Action
-        # Log that user performed an action (for future cooldown checks)
-        self._record_user_action(user_id)
+        # Log that user performed an action (for future cooldown checks).
+        # The cooldown starts in memory right away; the API is told in the
+        # background, since the request doesn't need its answer.
+        self._start_local_cooldown(user_id)
+        self._queue_record(user_id)
         
         # [PLACEHOLDER 12] - Allow Request
         # Request passes cooldown check, allow it to proceed
@@ -174,7 +304,7 @@ class CooldownPlugin(BasePlugin):
         # [REPLACE THIS] - Implement your user ID extraction logic
         return "default_user"  # Replace with actual extraction logic
     
-    def _is_user_in_cooldown(self, user_id: str) -> bool:
+    async def _is_user_in_cooldown(self, user_id: str) -> bool:
         """
         Check if user is currently in cooldown period.
         
@@ -192,23 +322,29 @@ class CooldownPlugin(BasePlugin):
         4. Redis/cache-based checking (for high performance)
         """
         
+        # Known to be in cooldown already? Answer without the API
+        if self._known_in_cooldown(user_id):
+            return True
+        
         try:
             # [PLACEHOLDER 15] - API Integration
             # Replace with your actual API endpoint and logic
             if COOLDOWN_API_URL:
                 # Example API call structure:
-                response = requests.get(
+                response = await self._client.get(
                     f"{COOLDOWN_API_URL}/check/{user_id}",  # Customize endpoint
-                    timeout=5  # Adjust timeout as needed
                 )
                 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = loads_json(response.content)
                     # [PLACEHOLDER 16] - API Response Processing
                     # Customize based on your API response format
                     # Example: return data.get('in_cooldown', False)
                     # Example: return data.get('time_remaining', 0) > 0
-                    return data.get('in_cooldown', False)  # Replace with your logic
+                    in_cooldown = data.get('in_cooldown', False)  # Replace with your logic
+                    if in_cooldown:
+                        self._remember_cooldown(user_id, COOLDOWN_CACHE_SECONDS)
+                    return in_cooldown
                 
                 # [PLACEHOLDER 17] - API Error Handling
                 # Handle API failures gracefully
@@ -223,10 +359,108 @@ class CooldownPlugin(BasePlugin):
         except Exception as e:
             # [PLACEHOLDER 19] - Exception Handling
             # Handle network errors, timeouts, etc.
-            print(f"Cooldown check failed: {e}")
+            log.warning("Cooldown check failed: %s", e)
             return False  # Default to allowing request on error
     
-    def _record_user_action(self, user_id: str) -> None:
+    async def _try_acquire(self, user_id: str) -> Optional[bool]:
+        """
+        Check AND record the action in one call: POST /acquire/{user_id}.
+        
+        [PLACEHOLDER 14b] - One-Step Acquire
+        The API decides and records in one server-side step, which takes one
+        round trip instead of two and stops two requests from both passing
+        the check before either is recorded.
+        Expected answers: {"allowed": true} or {"allowed": false, "remaining": N}
+        
+        Returns True (allowed, recorded) / False (in cooldown), or None when
+        the API has no /acquire endpoint.
+        """
+        if not COOLDOWN_API_URL or self._acquire_supported is False:
+            return None
+        try:
+            response = await self._client.post(
+                f"{COOLDOWN_API_URL}/acquire/{user_id}",  # Customize endpoint
+                content=dumps_json({'action_type': 'llm_request'}),  # Customize action type
+                headers=_JSON_HEADERS,
+            )
+            if response.status_code in (404, 405):  # Older API: check + record instead
+                self._acquire_supported = False
+                return None
+            self._acquire_supported = True
+            if response.status_code == 200:
+                data = loads_json(response.content)
+                if not data.get('allowed', True):
+                    # Keep the answer locally: retries and the violation
+                    # message then need no further API calls
+                    remaining = int(data.get('remaining', 0))
+                    self._remember_cooldown(
+                        user_id,
+                        min(remaining, COOLDOWN_CACHE_SECONDS),
+                        last_action=time.monotonic() - (COOLDOWN_PERIOD_SECONDS - remaining),
+                    )
+                    return False
+        except Exception as e:
+            # Same default as the check: allow the request on error
+            log.warning("Cooldown acquire failed: %s", e)
+        self._start_local_cooldown(user_id)
+        return True
+    
+    def _queue_record(self, user_id: str) -> None:
+        """Send the user's action to the API in the background (batched if possible)."""
+        if not COOLDOWN_API_URL:
+            return
+        if COOLDOWN_RECORD_FLUSH_SECONDS <= 0 or self._record_batch_supported is False:
+            self._spawn(self._record_user_action(user_id))
+            return
+        self._pending_records.append((user_id, datetime.now(timezone.utc).isoformat()))
+        if self._flush_task is None:  # First record of this interval: schedule the send
+            self._flush_task = self._spawn(self._flush_records())
+    
+    def _spawn(self, coro) -> asyncio.Task:
+        """Run coro in the background; close() waits for it."""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+    
+    async def _flush_records(self) -> None:
+        """
+        Wait COOLDOWN_RECORD_FLUSH_SECONDS, then send everything queued since.
+        
+        [PLACEHOLDER 20b] - Batched Recording
+        Expected API: POST /record_batch with a JSON list of
+        {"user_id": ..., "timestamp": ..., "action_type": ...}
+        """
+        await asyncio.sleep(COOLDOWN_RECORD_FLUSH_SECONDS)
+        batch, self._pending_records = self._pending_records, []
+        self._flush_task = None  # Records from now on start the next interval
+        
+        for start in range(0, len(batch), COOLDOWN_RECORD_BATCH_SIZE):
+            chunk = batch[start:start + COOLDOWN_RECORD_BATCH_SIZE]
+            if self._record_batch_supported is not False:
+                try:
+                    response = await self._client.post(
+                        f"{COOLDOWN_API_URL}/record_batch",  # Customize endpoint
+                        headers=_JSON_HEADERS,
+                        content=dumps_json([
+                            {'user_id': user_id, 'timestamp': timestamp, 'action_type': 'llm_request'}
+                            for user_id, timestamp in chunk
+                        ]),
+                    )
+                except Exception as e:
+                    log.warning("Error recording %d user actions: %s", len(chunk), e)
+                    continue
+                if response.status_code not in (404, 405):
+                    self._record_batch_supported = True
+                    if response.status_code != 200:
+                        log.warning("Failed to record %d user actions (HTTP %d)", len(chunk), response.status_code)
+                    continue
+                self._record_batch_supported = False  # Older API: one POST per action
+            await asyncio.gather(*(
+                self._record_user_action(user_id, timestamp) for user_id, timestamp in chunk
+            ))
+    
+    async def _record_user_action(self, user_id: str, timestamp: Optional[str] = None) -> None:
         """
         Record that user performed an action (starts cooldown timer).
         
@@ -248,29 +482,29 @@ class CooldownPlugin(BasePlugin):
             # [PLACEHOLDER 21] - Record Action Implementation
             if COOLDOWN_API_URL:
                 # Example API call to record action:
-                response = requests.post(
+                response = await self._client.post(
                     f"{COOLDOWN_API_URL}/record/{user_id}",  # Customize endpoint
-                    json={
-                        'timestamp': datetime.now(timezone.utc).isoformat(),
+                    headers=_JSON_HEADERS,
+                    content=dumps_json({
+                        'timestamp': timestamp or datetime.now(timezone.utc).isoformat(),
                         'action_type': 'llm_request',  # Customize action type
                         # [PLACEHOLDER 22] - Additional Metadata
                         # Add any extra data you want to track:
                         # 'request_size': len(str(request)),
                         # 'user_agent': request.headers.get('user-agent'),
                         # 'endpoint': request.endpoint,
-                    },
-                    timeout=5
+                    }),
                 )
                 
                 if response.status_code != 200:
-                    print(f"Failed to record action for user {user_id}")
+                    log.warning("Failed to record action for user %s (HTTP %d)", user_id, response.status_code)
             
         except Exception as e:
             # [PLACEHOLDER 23] - Recording Error Handling
-            print(f"Error recording user action: {e}")
+            log.warning("Error recording user action: %s", e)
             # Decide: Should failures block the request or just log?
     
-    def _handle_cooldown_violation(
+    async def _handle_cooldown_violation(
         self, 
         agent: BaseAgent, 
         request: LlmRequest, 
@@ -297,7 +531,7 @@ class CooldownPlugin(BasePlugin):
         """
         
         # [PLACEHOLDER 25] - Calculate Remaining Time
-        remaining_time = self._get_remaining_cooldown_time(user_id)
+        remaining_time = await self._get_remaining_cooldown_time(user_id)
         
         # [PLACEHOLDER 26] - Custom Error Response
         # Customize the message users see when in cooldown
@@ -319,12 +553,12 @@ class CooldownPlugin(BasePlugin):
         # context.response = error_message
         
         # Option 2: Log for debugging
-        print(f"Cooldown violation by user {user_id}: {remaining_time}s remaining")
+        log.info("Cooldown violation by user %s: %ss remaining", user_id, remaining_time)
         
         # Option 3: Send notification
         # self._notify_administrators(user_id, "cooldown_violation")
     
-    def _get_remaining_cooldown_time(self, user_id: str) -> int:
+    async def _get_remaining_cooldown_time(self, user_id: str) -> int:
         """
         Get remaining cooldown time for a user.
         
@@ -336,16 +570,22 @@ class CooldownPlugin(BasePlugin):
         - Add custom time formatting
         """
         
+        # Last action known locally? Then so is the remaining time
+        last = self._last_action.get(user_id)
+        if last is not None:
+            remaining = int(COOLDOWN_PERIOD_SECONDS - (time.monotonic() - last))
+            if remaining > 0:
+                return remaining
+        
         try:
             # [PLACEHOLDER 29] - API Call for Remaining Time
             if COOLDOWN_API_URL:
-                response = requests.get(
+                response = await self._client.get(
                     f"{COOLDOWN_API_URL}/remaining/{user_id}",
-                    timeout=5
                 )
                 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = loads_json(response.content)
                     return data.get('remaining_seconds', 0)
             
             # [PLACEHOLDER 30] - Fallback Time Calculation
@@ -353,9 +593,72 @@ class CooldownPlugin(BasePlugin):
             return COOLDOWN_PERIOD_SECONDS
             
         except Exception as e:
-            print(f"Error getting remaining time: {e}")
+            log.warning("Error getting remaining time: %s", e)
             return COOLDOWN_PERIOD_SECONDS
     
+    def _known_in_cooldown(self, user_id: str) -> bool:
+        """True if local state says user_id is still in cooldown (no API call)."""
+        until = self._cooldown_until.get(user_id)
+        if until is None:
+            return False
+        if until > time.monotonic():
+            return True
+        with self._cooldown_lock:  # Expired: forget it (unless it was just renewed)
+            if self._cooldown_until.get(user_id) == until:
+                del self._cooldown_until[user_id]
+        return False
+    
+    def _start_local_cooldown(self, user_id: str) -> None:
+        """The user's cooldown starts now: later checks can skip the API."""
+        self._remember_cooldown(user_id, COOLDOWN_PERIOD_SECONDS, last_action=time.monotonic())
+    
+    def _remember_cooldown(self, user_id: str, seconds: float, last_action: Optional[float] = None) -> None:
+        """Remember that user_id is in cooldown for the next `seconds` (and when it last acted)."""
+        now = time.monotonic()
+        until = now + seconds
+        with self._cooldown_lock:
+            if last_action is not None:
+                self._last_action[user_id] = last_action
+            if until > self._cooldown_until.get(user_id, 0.0):
+                self._cooldown_until[user_id] = until
+            if len(self._cooldown_until) + len(self._last_action) >= self._sweep_at:
+                self._evict_expired(now)
+    
+    def _evict_expired(self, now: float) -> None:
+        """Drop users whose cooldown has passed (caller holds _cooldown_lock)."""
+        self._cooldown_until = {u: t for u, t in self._cooldown_until.items() if t > now}
+        oldest = now - COOLDOWN_PERIOD_SECONDS
+        self._last_action = {u: t for u, t in self._last_action.items() if t > oldest}
+        size = len(self._cooldown_until) + len(self._last_action)
+        self._sweep_at = max(COOLDOWN_TABLE_SWEEP_AT, 2 * size)
+    
+    async def warm_up(self) -> None:
+        """
+        Open a keep-alive connection to the cooldown API before real traffic.
+        
+        Call it from your server's startup (e.g. a Starlette "startup"
+        handler), on the event loop that will run the checks. Failures are
+        ignored: the first check then simply connects itself.
+        """
+        if not COOLDOWN_API_URL:
+            return
+        try:
+            await self._client.get(f"{COOLDOWN_API_URL}/health", timeout=2)  # Customize endpoint
+        except httpx.HTTPError:
+            pass
+    
+    async def close(self) -> None:
+        """
+        Close the plugin's HTTP connections.
+        
+        ADK does not close plugins for you: call this when your server
+        shuts down (e.g. from a Starlette "shutdown" handler or an
+        AsyncExitStack), on the same event loop that ran the checks.
+        """
+        if self._background_tasks:  # Let pending records (and batches) reach the API first
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        await self._client.aclose()
+    
     # [PLACEHOLDER 31] - Additional Helper Methods
     # Add any other methods you need for your specific use case:
     
@@ -372,7 +675,9 @@ class CooldownPlugin(BasePlugin):
         """
         pass  # Implement your notification logic here
     
-    def _get_user_cooldown_settings(self, user_id: str) -> dict:
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _get_user_cooldown_settings(user_id: str) -> Mapping[str, object]:
         """
         Get user-specific cooldown settings.
         
@@ -381,12 +686,18 @@ class CooldownPlugin(BasePlugin):
         - Premium users might have shorter cooldowns
         - New users might have longer cooldowns
         - Admins might bypass cooldowns entirely
+        
+        Results are cached per user_id (the last 4096 users), so a lookup
+        costs nothing after the first request. The returned mapping is
+        read-only, because every caller shares it. If settings can change
+        while the server runs (e.g. a user upgrades), call
+        CooldownPlugin._get_user_cooldown_settings.cache_clear() afterwards.
         """
-        return {
+        return MappingProxyType({
             'cooldown_seconds': COOLDOWN_PERIOD_SECONDS,
             'max_requests_per_hour': 100,  # Example additional limit
             'bypass_cooldown': False
-        }
+        })
     
     def _log_cooldown_event(self, user_id: str, event_type: str, details: dict = None) -> None:
         """
@@ -399,6 +710,9 @@ class CooldownPlugin(BasePlugin):
         - Monitoring systems
         - Audit trails
         """
+        # Nothing is built while INFO logging is off
+        if not log.isEnabledFor(logging.INFO):
+            return
         log_entry = {
             'timestamp': datetime.now(timezone.utc).isoformat(),
             'user_id': user_id,
@@ -406,7 +720,7 @@ class CooldownPlugin(BasePlugin):
             'details': details or {}
         }
         # Implement your logging logic here
-        print(f"Cooldown event: {log_entry}")
+        log.info("Cooldown event: %s", log_entry)
 
 
 # [PLACEHOLDER 35] - Plugin Registration
@@ -433,11 +747,11 @@ def validate_configuration() -> bool:
     CUSTOMIZE: Add checks for your required configuration
     """
     if not COOLDOWN_API_URL:
-        print("WARNING: COOLDOWN_API_URL not configured")
+        log.warning("COOLDOWN_API_URL not configured")
         return False
     
     if COOLDOWN_PERIOD_SECONDS <= 0:
-        print("ERROR: COOLDOWN_PERIOD_SECONDS must be positive")
+        log.error("COOLDOWN_PERIOD_SECONDS must be positive")
         return False
     
     return True
@@ -515,6 +829,9 @@ CUSTOMIZATION CHECKLIST:
 □ Add logging and monitoring for your analytics system
 □ Test with your specific agent and request types
 □ Configure environment variables for deployment
+□ Call `await plugin.warm_up()` when your server starts (if the plugin is
+  created before the event loop runs)
+□ Call `await plugin.close()` when your server shuts down
 □ Add any business-specific validation rules
 
 DEPLOYMENT STEPS: